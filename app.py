@@ -1,12 +1,13 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, stream_with_context, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
-from functools import wraps
+from datetime import datetime, timedelta, timezone
+from functools import wraps, lru_cache
 import os
 from flask_mail import Mail, Message
 from celery import Celery
+from celery.worker.control import inspect_command
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from datetime import datetime
 import json
@@ -14,19 +15,59 @@ from flask_cors import CORS
 from flask import jsonify, request
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
+from collections import OrderedDict
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import table, column
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import re
+from sqlalchemy.ext.hybrid import hybrid_property
+import click
+import threading
+import time
+import base64
+import csv
+import io
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import multiprocessing
+import random
+import secrets
+import smtplib
+import redis
+from urllib.parse import urlencode
+import numpy as np
+from itertools import chain, islice
+
+try:
+    import orjson  # optional: faster JSON encoding for list endpoints
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///caremate.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///caremate.db')
+# Only SQLite is supported: upserts (ON CONFLICT), multi-row RETURNING, two-argument
+# min/max and julianday() date arithmetic are written for its dialect
+if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+    raise RuntimeError('DATABASE_URL must be a SQLite URL (sqlite:///path.db); other databases are not supported')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Identity cache configuration (token -> user snapshot shared across requests)
+app.config['IDENTITY_CACHE_TTL'] = int(os.environ.get('IDENTITY_CACHE_TTL', 300))  # seconds
+app.config['IDENTITY_CACHE_SIZE'] = int(os.environ.get('IDENTITY_CACHE_SIZE', 1024))
+
 # Add CORS configuration
 CORS(app, resources={r"/api/*": {
     "origins": ["http://localhost:5173", "http://localhost:5174"],  # Vue.js default ports
     "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    "allow_headers": ["Content-Type", "Authorization"]
+    "allow_headers": ["Content-Type", "Authorization"],
+    "expose_headers": ["Link", "X-Next-Cursor", "X-Total-Count"]  # keyset pagination of list endpoints
 }})
 
 # Initialize Flask-Mail and Celery
@@ -44,10 +85,90 @@ app.config.update(
 # Initialize Flask-Mail after the configuration
 mail = Mail(app)
 
+# Mail worker: SMTP connections are pooled per worker process and reused across batches
+app.config['MAIL_POOL_SIZE'] = 4  # idle connections kept open per process
+app.config['MAIL_CONNECTION_MAX_AGE'] = 240  # seconds; reconnect before servers drop idle sessions
+app.config['MAIL_BATCH_SIZE'] = 50  # messages per batch task, sent over one connection
+app.config['MAIL_MAX_RETRIES'] = 5  # retries of transient failures, with exponential backoff
+app.config['MAIL_RETRY_BACKOFF'] = 10  # seconds before the first retry
+
 # Celery configuration
 app.config['CELERY_BROKER_URL'] = 'redis://localhost:6379/0'
 app.config['CELERY_RESULT_BACKEND'] = 'redis://localhost:6379/0'
 
+# Socket.IO across several worker processes or hosts: share emits through a message queue
+# and keep presence and call state in Redis; the defaults suit a single process
+app.config['SOCKETIO_MESSAGE_QUEUE'] = os.environ.get('SOCKETIO_MESSAGE_QUEUE')  # e.g. redis://localhost:6379/1
+app.config['PRESENCE_BACKEND'] = os.environ.get('PRESENCE_BACKEND', 'memory')  # 'memory' or 'redis'
+app.config['PRESENCE_REDIS_URL'] = os.environ.get('PRESENCE_REDIS_URL', 'redis://localhost:6379/1')
+app.config['PRESENCE_TTL'] = 90  # seconds a socket stays online unless its worker refreshes it
+app.config['CALL_STATE_TTL'] = 6 * 3600  # seconds an active call's state is kept at most
+
+# Health metric resolution: raw readings up to HEALTH_RAW_MAX_DAYS, hourly rollups up to
+# HEALTH_HOURLY_MAX_DAYS, daily rollups beyond that
+app.config['HEALTH_RAW_MAX_DAYS'] = 7
+app.config['HEALTH_HOURLY_MAX_DAYS'] = 90
+
+# Each elderly user's emergency contacts (with the contact users' details) are cached
+# until a contact is added or removed or a contact user changes
+app.config['EMERGENCY_CONTACT_CACHE_TTL'] = 300  # seconds; bounds staleness if invalidations aren't shared
+app.config['EMERGENCY_CONTACT_CACHE_SIZE'] = 4096
+
+# Unresolved emergency alerts are served from memory, reloaded at least this often so
+# alerts raised or changed by other processes show up
+app.config['OPEN_ALERT_INDEX_TTL'] = 30  # seconds
+
+# Latest-reading alert results are cached per user until a new reading or rule change
+app.config['HEALTH_ALERT_CACHE_TTL'] = 3600  # seconds
+app.config['HEALTH_ALERT_CACHE_SIZE'] = 4096
+
+# With several worker processes, invalidations of the emergency contact, health alert and
+# open alert caches are shared through generation counters in Redis; unset, a process
+# only sees other processes' changes once its cached entries expire
+app.config['CACHE_INVALIDATION_REDIS_URL'] = os.environ.get('CACHE_INVALIDATION_REDIS_URL')  # e.g. redis://localhost:6379/1
+
+# Batch ingestion limits for /api/health/metrics/batch
+app.config['HEALTH_BATCH_MAX_READINGS'] = 5000
+app.config['HEALTH_BATCH_CHUNK_SIZE'] = 500
+
+# Caregiver leaderboard configuration
+app.config['LEADERBOARD_SIZE'] = 50  # entries kept per bucket
+app.config['LEADERBOARD_PRIOR_WEIGHT'] = 5  # pseudo-reviews at the global mean rating
+app.config['LEADERBOARD_REFRESH_INTERVAL'] = 300  # seconds between scheduled refreshes
+app.config['LEADERBOARD_REFRESH_DEBOUNCE'] = 30  # seconds to coalesce refreshes after reviews
+
+# Emergency alerts run on their own queue so bulk mail never delays them; start a
+# dedicated worker with `celery -A app.celery worker -Q emergency`
+app.config['CELERY_ROUTES'] = {
+    'caremate.dispatch_emergency_alert': {'queue': 'emergency'},
+    'caremate.escalate_emergency_alert': {'queue': 'emergency'}
+}
+app.config['EMERGENCY_DISPATCH_CONCURRENCY'] = 8  # contacts emailed in parallel per alert
+app.config['EMERGENCY_DISPATCH_MAX_RETRIES'] = 3  # resends of failed deliveries, with backoff
+app.config['EMERGENCY_ESCALATION_TIMEOUT'] = 120  # seconds without an acknowledgement
+app.config['EMERGENCY_MAX_ESCALATIONS'] = 3
+
+# Task reminders: minutes before the due time; a task gets one reminder per lead time whose
+# window it enters, but only the closest one if it is created or rescheduled inside several
+app.config['TASK_REMINDER_LEAD_TIMES'] = [24 * 60, 60, 15]
+app.config['TASK_REMINDER_SCAN_INTERVAL'] = 60  # seconds between scans
+app.config['TASK_REMINDER_BATCH_SIZE'] = 500  # due tasks read and claimed per statement
+
+# Recurring tasks are expanded for the requested window only, so bound the window
+app.config['TASK_WINDOW_MAX_DAYS'] = 366
+
+# Periodic jobs, run with `celery -A app.celery beat`
+app.config['CELERYBEAT_SCHEDULE'] = {
+    'send-task-reminders': {
+        'task': 'caremate.send_task_reminders',
+        'schedule': app.config['TASK_REMINDER_SCAN_INTERVAL']
+    },
+    'refresh-caregiver-leaderboard': {
+        'task': 'caremate.refresh_leaderboard',
+        'schedule': app.config['LEADERBOARD_REFRESH_INTERVAL']
+    }
+}
+
 
 # Initialize Celery
 celery = Celery(
@@ -58,24 +179,220 @@ celery.conf.update(app.config)
 
 
 
-@celery.task
-def send_async_email(subject, sender, recipients, body):
-    """Celery task to send email asynchronously"""
+class SMTPConnectionPool:
+    """Persistent Flask-Mail connections shared by the threads of one process.
+
+    Connections are opened lazily, returned to the pool after use and recycled after
+    MAIL_CONNECTION_MAX_AGE; a connection that raised is closed instead of reused.
+    The pool is reset in forked children (e.g. Celery prefork workers) so sockets are
+    never shared between processes.
+    """
+
+    def __init__(self, size, max_age):
+        self.size = size
+        self.max_age = max_age
+        self._idle = []  # (connection, opened_at)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _take_idle(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle, self._pid = [], os.getpid()
+            while self._idle:
+                connection, opened_at = self._idle.pop()
+                if time.monotonic() - opened_at < self.max_age:
+                    return connection, opened_at
+                self._close(connection)
+        return None, None
+
+    @staticmethod
+    def _close(connection):
+        try:
+            if connection.host is not None:
+                connection.host.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    @contextmanager
+    def connection(self):
+        connection, opened_at = self._take_idle()
+        if connection is None:
+            connection = mail.connect()
+            connection.__enter__()
+            opened_at = time.monotonic()
+            mail_metrics.add(connections_opened=1)
+        else:
+            mail_metrics.add(connections_reused=1)
+        try:
+            yield connection
+        except BaseException:
+            self._close(connection)
+            raise
+        with self._lock:
+            if len(self._idle) < self.size and self._pid == os.getpid():
+                self._idle.append((connection, opened_at))
+                return
+        self._close(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+class MailMetrics:
+    """Mail throughput counters in shared memory, so counts from Celery prefork
+    children are visible to the worker's main process (and `celery inspect`)"""
+    FIELDS = ('sent', 'failed', 'retried', 'batches', 'connections_opened', 'connections_reused',
+              'send_seconds')
+
+    def __init__(self):
+        self._values = multiprocessing.Array('d', len(self.FIELDS))
+        self.started_at = time.time()
+
+    def add(self, **counts):
+        with self._values.get_lock():
+            for field, count in counts.items():
+                self._values[self.FIELDS.index(field)] += count
+
+    def snapshot(self):
+        with self._values.get_lock():
+            values = dict(zip(self.FIELDS, self._values[:]))
+        uptime = time.time() - self.started_at
+        return {
+            **{field: int(value) for field, value in values.items() if field != 'send_seconds'},
+            'send_seconds': round(values['send_seconds'], 3),
+            'uptime_seconds': round(uptime, 1),
+            # While sending vs. averaged over the worker's lifetime
+            'messages_per_second': round(values['sent'] / values['send_seconds'], 2) if values['send_seconds'] else 0.0,
+            'messages_per_minute_overall': round(values['sent'] / uptime * 60, 2) if uptime else 0.0
+        }
+
+mail_pool = SMTPConnectionPool(app.config['MAIL_POOL_SIZE'], app.config['MAIL_CONNECTION_MAX_AGE'])
+mail_metrics = MailMetrics()
+
+@inspect_command()
+def mail_stats(state):
+    """Mail throughput of this worker: `celery -A app.celery inspect mail_stats`"""
+    return mail_metrics.snapshot()
+
+def is_transient_mail_error(error):
+    """Whether a failed send is worth retrying: dropped connections, timeouts and 4xx replies"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError, so only plain socket errors are left here
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+def deliver_messages(messages):
+    """Send message dicts (subject, sender, recipients, body) over pooled connections.
+
+    Returns (sent, transient failures, permanent failures); failures are the message
+    dicts. After a connection-level failure the rest of the batch is not attempted but
+    returned as transient failures, so an unreachable server costs one connect timeout
+    per batch rather than one per message.
+    """
+    sent, transient, permanent = 0, [], []
+    started = time.monotonic()
+    pending = list(messages)
     try:
-        with app.app_context():
-            msg = Message(subject,
-                        sender=sender,
-                        recipients=recipients)
-            msg.body = body
-            mail.send(msg)
-            return 'Mail sent successfully'
+        with mail_pool.connection() as connection:
+            while pending:
+                item = pending[0]
+                try:
+                    connection.send(Message(item['subject'], sender=item['sender'],
+                                            recipients=item['recipients'], body=item['body']))
+                    sent += 1
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    # The session is still usable after a refused message
+                    (transient if is_transient_mail_error(e) else permanent).append(item)
+                    print(f"Error sending email to {item['recipients']}: {str(e)}")
+                pending.pop(0)
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
-        return f'Failed to send email: {str(e)}'
+        # Connection-level failure: the current message fails, the rest wait for the retry
+        if pending:
+            item = pending.pop(0)
+            (transient if is_transient_mail_error(e) else permanent).append(item)
+            transient.extend(pending)
+            print(f"Error sending email to {item['recipients']}: {str(e)}; "
+                  f"deferring {len(pending)} more to the retry")
+
+    mail_metrics.add(sent=sent, failed=len(transient) + len(permanent), batches=1,
+                     send_seconds=time.monotonic() - started)
+    return sent, transient, permanent
+
+@celery.task(bind=True, name='caremate.send_email_batch')
+def send_email_batch(self, messages):
+    """Celery task sending a batch of emails over one pooled connection.
+
+    Transient failures are retried with exponential backoff; permanent ones are logged
+    and dropped.
+    """
+    with app.app_context():
+        sent, transient, permanent = deliver_messages(messages)
+    app.logger.debug("Mail batch: %d sent, %d to retry, %d failed", sent, len(transient), len(permanent))
+
+    if transient:
+        if self.request.retries < app.config['MAIL_MAX_RETRIES']:
+            mail_metrics.add(retried=len(transient))
+            backoff = app.config['MAIL_RETRY_BACKOFF'] * 2 ** self.request.retries
+            raise self.retry(args=[transient], countdown=backoff + random.uniform(0, backoff / 2))
+        print(f"Giving up on {len(transient)} emails after {self.request.retries} retries")
+    return {'sent': sent, 'failed': len(transient) + len(permanent)}
+
+@celery.task
+def send_async_email(subject, sender, recipients, body):
+    """Celery task to send one email; kept for messages queued before batching"""
+    send_email_batch.delay([{'subject': subject, 'sender': sender, 'recipients': recipients, 'body': body}])
+
+def queue_email(subject, sender, recipients, body):
+    """Queue an email for the mail worker.
+
+    Inside a request, emails are collected and sent as batches once the request ends
+    (or earlier, with send_mail_outbox); elsewhere (tasks, CLI) each call queues its own
+    batch.
+    """
+    message = {'subject': subject, 'sender': sender, 'recipients': recipients, 'body': body}
+    if has_request_context():
+        g.setdefault('mail_outbox', []).append(message)
+    else:
+        send_email_batch.delay([message])
+
+def queue_email_batches(messages):
+    """Queue message dicts for the mail worker in batches of MAIL_BATCH_SIZE"""
+    batch_size = app.config['MAIL_BATCH_SIZE']
+    for start in range(0, len(messages), batch_size):
+        send_email_batch.delay(messages[start:start + batch_size])
+
+def send_mail_outbox():
+    """Queue the emails collected so far in this request now, raising if the broker is
+    unreachable, so callers can handle the failure where the email is sent"""
+    outbox = g.pop('mail_outbox', None)
+    if outbox:
+        queue_email_batches(outbox)
+
+@app.teardown_request
+def flush_mail_outbox(exc):
+    outbox = g.pop('mail_outbox', None)
+    if outbox and exc is not None:
+        # The request failed and its changes were rolled back, so its emails describe nothing
+        print(f"Dropping {len(outbox)} queued emails of a failed request: {str(exc)}")
+        return
+    # The response is already decided here, so a broker failure is logged, not raised
+    batch_size = app.config['MAIL_BATCH_SIZE']
+    for start in range(0, len(outbox or []), batch_size):
+        try:
+            send_email_batch.delay(outbox[start:start + batch_size])
+        except Exception as e:
+            print(f"Failed to queue {len(outbox[start:start + batch_size])} emails: {str(e)}")
 
 def send_welcome_email(user):
     """Send welcome email to new user"""
-    send_async_email.delay(
+    queue_email(
         'Welcome to CareMate!',
         'noreply@caremate.com',
         [user.email],
@@ -87,13 +404,13 @@ Best regards,
 The CareMate Team'''
     )
 
-def send_task_reminder_email(user, task):
-    """Send task reminder email"""
-    send_async_email.delay(
-        f'Reminder: {task.title}',
-        'reminders@caremate.com',
-        [user.email],
-        f'''Hello {user.name},
+def task_reminder_email(name, email, task):
+    """Message dict reminding a user of a task (any object with title, due_time, description)"""
+    return {
+        'subject': f'Reminder: {task.title}',
+        'sender': 'reminders@caremate.com',
+        'recipients': [email],
+        'body': f'''Hello {name},
 
 This is a reminder for your task:
 Title: {task.title}
@@ -102,30 +419,25 @@ Description: {task.description}
 
 Best regards,
 CareMate'''
-    )
+    }
 
-def send_emergency_alert_email(emergency_contacts, alert_message, elderly_user):
-    """Send emergency alert to all emergency contacts"""
-    for contact in emergency_contacts:
-        contact_user = User.query.get(contact.contact_id)
-        send_async_email.delay(
-            'EMERGENCY ALERT',
-            'alerts@caremate.com',
-            [contact_user.email],
-            f'''EMERGENCY ALERT
+def emergency_alert_email(alert, elderly_name, escalation_level=0):
+    """(subject, body) of the email sent to each contact for an emergency alert"""
+    subject = 'EMERGENCY ALERT' if not escalation_level else f'EMERGENCY ALERT - REMINDER {escalation_level}: NOT YET ACKNOWLEDGED'
+    return subject, f'''EMERGENCY ALERT
 
-Patient: {elderly_user.name}
-Time: {datetime.utcnow().isoformat()}
-Message: {alert_message}
+Patient: {elderly_name}
+Time: {alert.created_at.isoformat()}
+Message: {alert.message}
+Location: {alert.location or 'Location not provided'}
 
-Please respond immediately.
+Please respond immediately and acknowledge this alert in CareMate.
 
 CareMate Emergency System'''
-        )
 
 def send_health_alert_email(user, alert):
     """Send health metric alert email"""
-    send_async_email.delay(
+    queue_email(
         'Health Alert',
         'health@caremate.com',
         [user.email],
@@ -142,19 +454,190 @@ CareMate Health Monitoring System'''
     )
 
 
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    With `generations` (see CacheGenerations), pop() and clear() are seen by every
+    process: entries loaded under an older generation count as misses.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, generations=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generations = generations
+        self._data = OrderedDict()
+        self._version = 0  # bumped by every local invalidation
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl, generation)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, load):
+        """The cached value for `key`, or load() it. The loaded value is only cached if
+        the key was not invalidated, here or elsewhere, while it was being loaded, and
+        is not None."""
+        generation = None
+        if self.generations:
+            try:
+                generation = self.generations.current(key)
+            except redis.RedisError as e:
+                print(f"Cache generation lookup failed, bypassing cache: {str(e)}")
+                return load()
+        with self._lock:
+            version = self._version
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic() and entry[2] == generation:
+                self._data.move_to_end(key)
+                return entry[0]
+        value = load()
+        with self._lock:
+            if value is None or self._version != version:
+                return value
+        self.set(key, value, generation)
+        return value
+
+    def pop(self, key, default=None):
+        if self.generations:
+            self.generations.bump(key)
+        with self._lock:
+            self._version += 1
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        if self.generations:
+            self.generations.bump()
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class CacheGenerations:
+    """Invalidation counters for one cache, kept in Redis so every process sees them.
+
+    A key's generation is the pair (cache-wide counter, key counter); bump() moves the
+    key's counter, or the cache-wide one when no key is given. Failing to bump is
+    logged: other processes then see the change once their entries expire.
+    """
+
+    def __init__(self, client, name, prefix='caremate'):
+        self.client = client
+        self.name = name
+        self.prefix = prefix
+
+    def _key(self, key):
+        if isinstance(key, tuple):
+            key = ':'.join(str(part) for part in key)
+        return f'{self.prefix}:cache:{self.name}:{key}'
+
+    def current(self, key=None):
+        return tuple(int(value or 0) for value in self.client.mget(self._key('*'), self._key(key)))
+
+    def bump(self, key=None):
+        try:
+            return self.client.incr(self._key('*' if key is None else key))
+        except redis.RedisError as e:
+            print(f"Cache invalidation for {self.name} not shared: {str(e)}")
+            return None
+
+def cache_generations(name):
+    """Shared invalidation counters for a cache, if CACHE_INVALIDATION_REDIS_URL is set"""
+    global cache_redis
+    url = app.config['CACHE_INVALIDATION_REDIS_URL']
+    if not url:
+        return None
+    if cache_redis is None:
+        cache_redis = redis.Redis.from_url(url, socket_timeout=1)
+    return CacheGenerations(cache_redis, name)
+
+cache_redis = None
+
+def invalidate_after_commit(session, cache, key=None):
+    """Pop `key` from `cache` (or clear it, without a key) once the session commits, so
+    a concurrent read cannot re-cache the data being replaced; dropped on rollback"""
+    session.info.setdefault('cache_invalidations', []).append((cache, key))
+
+@event.listens_for(Session, 'after_commit')
+def run_cache_invalidations(session):
+    for cache, key in session.info.pop('cache_invalidations', []):
+        if key is None:
+            cache.clear()
+        else:
+            cache.pop(key)
+
+@event.listens_for(Session, 'after_rollback')
+def drop_cache_invalidations(session):
+    session.info.pop('cache_invalidations', None)
+
+
 db = SQLAlchemy(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 
-def get_current_user():
-    auth_header = request.headers.get('Authorization')
+class UserSnapshot:
+    """Detached, read-only copy of the User columns needed by request handlers"""
+    __slots__ = ('id', 'email', 'user_type', 'name', 'phone')
+
+    def __init__(self, user):
+        for field in self.__slots__:
+            setattr(self, field, getattr(user, field))
+
+identity_cache = TTLCache(
+    maxsize=app.config['IDENTITY_CACHE_SIZE'],
+    ttl=app.config['IDENTITY_CACHE_TTL'],
+    generations=cache_generations('identities')
+)
+
+def load_identity(user_id):
+    """Snapshot of a user, from the identity cache or the user table; None if there is no such user"""
+    def load():
+        row = db.session.get(User, user_id)
+        return UserSnapshot(row) if row is not None else None
+    return identity_cache.get_or_load(user_id, load)
+
+def resolve_token(auth_header):
+    """Resolve an Authorization header to a user snapshot, hitting the DB only on cache miss"""
     if not auth_header:
         return None
     try:
-        token = auth_header.split(" ")[1]
-        return User.query.get(int(token))
-    except:
+        user_id = int(auth_header.split(" ")[1])
+    except (IndexError, ValueError):
         return None
+    return load_identity(user_id)
+
+def get_current_user():
+    """Return the authenticated user, resolved at most once per request or socket connection"""
+    if 'current_user' in g:
+        return g.current_user
+
+    sid = getattr(request, 'sid', None)
+    if sid is not None and sid in sid_user_mapping:
+        # Through the identity cache, so socket events see user edits made on any worker
+        return load_identity(sid_user_mapping[sid])
+
+    user = resolve_token(request.headers.get('Authorization'))
+    g.current_user = user
+    if sid is not None and user is not None:
+        sid_user_mapping[sid] = user.id
+    return user
 
 def api_login_required(f):
     @wraps(f)
@@ -166,6 +649,149 @@ def api_login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Pagination helpers
+MAX_PER_PAGE = 100
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, returning None if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+def keyset_filter(order, values):
+    """Build a WHERE clause selecting rows strictly after `values` for `order`.
+
+    `order` is a list of (column, descending) pairs; the last pair must be unique.
+    """
+    clauses = []
+    for i, ((column, descending), value) in enumerate(zip(order, values)):
+        comparison = column < value if descending else column > value
+        equal_prefix = [c == v for (c, _), v in zip(order[:i], values[:i])]
+        clauses.append(db.and_(*equal_prefix, comparison))
+    return db.or_(*clauses)
+
+def keyset_order_by(order):
+    return [column.desc() if descending else column.asc() for column, descending in order]
+
+def decode_keyset_cursor(cursor, order):
+    """Decode a cursor for `order`, turning timestamps back into datetimes; None if malformed"""
+    values = decode_cursor(cursor)
+    if values is None or len(values) != len(order):
+        return None
+    try:
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, db.DateTime) else value
+            for (column, _), value in zip(order, values)
+        ]
+    except (TypeError, ValueError):
+        return None
+
+def keyset_page(query, order, per_page, after=None, include_total=False, offset=0):
+    """Fetch one page of a select ordered by `order`, starting after the decoded cursor `after`
+    (or skipping `offset` rows, for endpoints that still accept page numbers).
+
+    Returns (rows, next_cursor, total); the sort key is selected as extra trailing
+    columns, so a RowSchema rendering the rows ignores it. total is only counted
+    when asked for.
+    """
+    total = None
+    if include_total:
+        total = db.session.scalar(db.select(db.func.count()).select_from(query.order_by(None).subquery()))
+    if after is not None:
+        query = query.where(keyset_filter(order, after))
+    query = query.add_columns(*(column.label(f'sort_key_{i}') for i, (column, _) in enumerate(order)))
+    query = query.order_by(*keyset_order_by(order)).limit(per_page + 1)
+    if offset:
+        query = query.offset(offset)
+    rows = db.session.execute(query).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in rows[-1][-len(order):]
+        ])
+    return rows, next_cursor, total
+
+def pagination_headers(next_cursor, total=None):
+    """Link/X-Next-Cursor/X-Total-Count headers for list endpoints that return bare arrays"""
+    headers = {}
+    if next_cursor:
+        args = request.args.to_dict(flat=False)
+        args['cursor'] = [next_cursor]
+        headers['Link'] = f'<{request.base_url}?{urlencode(args, doseq=True)}>; rel="next"'
+        headers['X-Next-Cursor'] = next_cursor
+    if total is not None:
+        headers['X-Total-Count'] = str(total)
+    return headers
+
+def pagination_args(default_per_page=20):
+    """(per_page, cursor, include_total) from the query string"""
+    per_page = min(max(request.args.get('per_page', default_per_page, type=int), 1), MAX_PER_PAGE)
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    return per_page, request.args.get('cursor'), include_total
+
+# JSON serialization helpers for list endpoints
+SERIALIZE_CHUNK_SIZE = 1000  # rows fetched per yield_per partition and encoded per streamed chunk
+
+class RowSchema:
+    """Output keys mapped to column expressions, so list endpoints select plain
+    tuples instead of ORM objects and render them without per-field Python code"""
+    def __init__(self, *fields):
+        self.keys = tuple(key for key, _ in fields)
+        self.columns = [expression.label(key) for key, expression in fields]
+
+    def select(self):
+        return db.select(*self.columns)
+
+    def dicts(self, rows):
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in rows]
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps_json(payload):
+    """Encode to JSON bytes; datetimes render as isoformat() on both encoders"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+
+def json_response(payload, status=200, headers=None):
+    return app.response_class(dumps_json(payload), status=status, headers=headers,
+                              mimetype='application/json')
+
+def iter_row_dicts(schema, query):
+    """Yield the rows of `query` as lists of dicts, one yield_per partition at a time,
+    so memory stays constant however many rows match"""
+    result = db.session.execute(query.execution_options(yield_per=SERIALIZE_CHUNK_SIZE))
+    for partition in result.partitions():
+        yield schema.dicts(partition)
+
+def streaming_response(chunks, mimetype, headers=None):
+    return app.response_class(stream_with_context(chunks), headers=headers, mimetype=mimetype)
+
+def stream_json_array(schema, query, headers=None):
+    """Stream the rows of `query` as a JSON array"""
+    def generate():
+        yield b'['
+        separator = b''
+        for dicts in iter_row_dicts(schema, query):
+            # Encode the partition as one list and drop its brackets
+            yield separator + dumps_json(dicts)[1:-1]
+            separator = b','
+        yield b']'
+    return streaming_response(generate(), 'application/json', headers)
+
 # Database Models
 class HealthMetric(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -180,6 +806,61 @@ class HealthMetric(db.Model):
     systolic = db.Column(db.Float)  # For blood pressure only
     diastolic = db.Column(db.Float)  # For blood pressure only
 
+    # Client-supplied key so device gateways can retry batches without duplicating readings
+    idempotency_key = db.Column(db.String(100))
+
+    # Set once an out-of-range alert email has been queued for this reading
+    alert_notified_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_health_metric_user_type_timestamp', 'user_id', 'metric_type', 'timestamp'),
+        db.Index('ix_health_metric_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('uq_health_metric_user_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
+
+class HealthMetricRollup(db.Model):
+    """Hourly/daily aggregates of HealthMetric, maintained incrementally on insert"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    metric_type = db.Column(db.String(50), nullable=False)
+    resolution = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    unit = db.Column(db.String(20))
+    reading_count = db.Column(db.Integer, nullable=False)
+
+    # Single-value metrics
+    value_sum = db.Column(db.Float)
+    value_min = db.Column(db.Float)
+    value_max = db.Column(db.Float)
+
+    # Blood pressure
+    systolic_sum = db.Column(db.Float)
+    systolic_min = db.Column(db.Float)
+    systolic_max = db.Column(db.Float)
+    diastolic_sum = db.Column(db.Float)
+    diastolic_min = db.Column(db.Float)
+    diastolic_max = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index('uq_health_metric_rollup_bucket', 'user_id', 'resolution', 'metric_type', 'bucket_start',
+                 unique=True),
+    )
+
+class HealthAlertRule(db.Model):
+    """Per-user override of a normal range (e.g. set by a clinician)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    metric_type = db.Column(db.String(50), nullable=False)
+    field = db.Column(db.String(20), nullable=False)  # value, systolic, diastolic
+    min_value = db.Column(db.Float)  # None keeps the default bound
+    max_value = db.Column(db.Float)
+    updated_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('uq_health_alert_rule_user_metric_field', 'user_id', 'metric_type', 'field', unique=True),
+    )
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -198,22 +879,59 @@ class Review(db.Model):
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_review_caregiver_created_at', 'caregiver_id', 'created_at'),
+        db.Index('uq_review_caregiver_reviewer', 'caregiver_id', 'reviewer_id', unique=True),
+    )
+
 class Caregiver(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     hourly_rate = db.Column(db.Float, nullable=False)
     experience_years = db.Column(db.Integer)
     specializations = db.Column(db.Text)
     verification_status = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     reviews = db.relationship('Review', backref='caregiver', lazy=True)
-    
-    @property
+
+    # Rating aggregates, maintained by create_review and rebuilt by `flask rebuild-ratings`
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    @hybrid_property
     def average_rating(self):
-        reviews = self.reviews
-        if not reviews:
+        if not self.rating_count:
             return 0
-        return sum(review.rating for review in reviews) / len(reviews)
+        return self.rating_sum / self.rating_count
+
+    @average_rating.expression
+    def average_rating(cls):
+        return db.case(
+            (cls.rating_count > 0, cls.rating_sum * 1.0 / cls.rating_count),
+            else_=0
+        )
+
+    @property
+    def rating_distribution(self):
+        return {str(star): getattr(self, f'rating_{star}_count') or 0 for star in range(1, 6)}
+
+caregiver_specialization = db.Table(
+    'caregiver_specialization',
+    db.Column('caregiver_id', db.Integer, db.ForeignKey('caregiver.id'), primary_key=True),
+    db.Column('specialization_id', db.Integer, db.ForeignKey('specialization.id'), primary_key=True),
+    db.Index('ix_caregiver_specialization_specialization_id', 'specialization_id', 'caregiver_id')
+)
+
+class Specialization(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # normalized, lower case
+    caregivers = db.relationship('Caregiver', secondary=caregiver_specialization,
+                                 backref=db.backref('specialization_tags', lazy=True), lazy=True)
 
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -224,14 +942,108 @@ class Task(db.Model):
     is_completed = db.Column(db.Boolean, default=False)
     task_type = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Recurring tasks: RRULE-style rule (e.g. 'FREQ=DAILY;INTERVAL=1'), due_time is the first
+    # occurrence and is_completed ends the series; occurrences are expanded per query window
+    recurrence = db.Column(db.String(100))
+    recurrence_until = db.Column(db.DateTime)
 
-class EmergencyContact(db.Model):
+    __table_args__ = (
+        db.Index('ix_task_user_completed_due_time', 'user_id', 'is_completed', 'due_time'),
+        db.Index('ix_task_user_due_time', 'user_id', 'due_time'),
+        # Reminder scans look for pending tasks due soon across all users
+        db.Index('ix_task_completed_due_time', 'is_completed', 'due_time'),
+        db.Index('ix_task_series_completed_due_time', 'is_completed', 'due_time',
+                 sqlite_where=recurrence.isnot(None)),
+    )
+
+class CareTeamMember(db.Model):
+    """A caregiver or family member linked to an elderly user, who can follow their tasks"""
     id = db.Column(db.Integer, primary_key=True)
     elderly_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    member_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    role = db.Column(db.String(20), nullable=False)  # 'caregiver' or 'family'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('elderly_id', 'member_id', name='uq_care_team_member_elderly_member'),
+        db.Index('ix_care_team_member_member_elderly', 'member_id', 'elderly_id'),
+    )
+
+class TaskOccurrence(db.Model):
+    """Per-occurrence state of a recurring task; only occurrences marked done are stored"""
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    occurrence_time = db.Column(db.DateTime, nullable=False)
+    is_completed = db.Column(db.Boolean, default=True, nullable=False)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('task_id', 'occurrence_time', name='uq_task_occurrence_task_time'),
+    )
+
+class TaskReminder(db.Model):
+    """A reminder sent for a task; one per lead time and due time, so rescheduling re-arms it"""
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    lead_minutes = db.Column(db.Integer, nullable=False)
+    due_time = db.Column(db.DateTime, nullable=False)
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('task_id', 'lead_minutes', 'due_time', name='uq_task_reminder_task_lead_due'),
+    )
+
+class EmergencyContact(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    elderly_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     contact_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     relationship = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    elderly = db.relationship('User', foreign_keys=[elderly_id], backref='emergency_contacts')
+    contact = db.relationship('User', foreign_keys=[contact_id], backref='emergency_contact_of')
+
+class EmergencyAlert(db.Model):
+    """An emergency raised by an elderly user and dispatched to all their emergency contacts"""
+    id = db.Column(db.Integer, primary_key=True)
+    elderly_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    location = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='active')  # active, acknowledged, resolved
+    escalation_level = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    acknowledged_at = db.Column(db.DateTime)
+    acknowledged_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    resolved_at = db.Column(db.DateTime)
+    resolved_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+
+    elderly = db.relationship('User', foreign_keys=[elderly_id])
+    deliveries = db.relationship('EmergencyAlertDelivery', backref='alert', order_by='EmergencyAlertDelivery.id')
+
+    __table_args__ = (
+        db.Index('ix_emergency_alert_elderly_created_at', 'elderly_id', 'created_at'),
+        db.Index('ix_emergency_alert_status', 'status'),
+    )
+
+class EmergencyAlertDelivery(db.Model):
+    """Delivery status of one emergency alert to one contact"""
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('emergency_alert.id'), nullable=False)
+    contact_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    email_status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sent, failed
+    push_status = db.Column(db.String(20), nullable=False, default='offline')  # delivered, offline
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+    acknowledged_at = db.Column(db.DateTime)
+
+    contact = db.relationship('User', foreign_keys=[contact_id])
+
+    __table_args__ = (
+        db.Index('uq_emergency_alert_delivery_alert_contact', 'alert_id', 'contact_id', unique=True),
+        db.Index('ix_emergency_alert_delivery_contact_alert', 'contact_id', 'alert_id'),
+    )
+
 class Call(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     room_id = db.Column(db.String(100), unique=True, nullable=False)
@@ -240,29 +1052,374 @@ class Call(db.Model):
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime)
     status = db.Column(db.String(20), default='initiated')  # initiated, active, ended, missed
+    answered_at = db.Column(db.DateTime)  # when the callee joined; talk time runs from here
     
     caller = db.relationship('User', foreign_keys=[caller_id], backref='outgoing_calls')
     callee = db.relationship('User', foreign_keys=[callee_id], backref='incoming_calls')
 
-# Initialize SocketIO after creating Flask app
-socketio = SocketIO(app, cors_allowed_origins="*")
+    __table_args__ = (
+        db.Index('ix_call_caller_start_time', 'caller_id', 'start_time'),
+        db.Index('ix_call_callee_start_time', 'callee_id', 'start_time'),
+    )
+
+class LeaderboardEntry(db.Model):
+    """Materialized caregiver ranking, rebuilt by refresh_leaderboard()"""
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.String(100), nullable=False)  # '' for overall, else a specialization
+    rank = db.Column(db.Integer, nullable=False)
+    caregiver_id = db.Column(db.Integer, db.ForeignKey('caregiver.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    average_rating = db.Column(db.Float, nullable=False)
+    total_reviews = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    hourly_rate = db.Column(db.Float, nullable=False)
+    experience_years = db.Column(db.Integer)
+    specializations = db.Column(db.Text)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_leaderboard_entry_bucket_rank', 'bucket', 'rank'),
+    )
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_user_identity(mapper, connection, target):
+    """Keep the identity and emergency contact caches coherent with writes to the user table"""
+    invalidate_after_commit(db.session(), identity_cache, target.id)
+    # Contact lists embed contact users' details; user edits are rare, so drop them all
+    invalidate_after_commit(db.session(), emergency_contact_cache)
+
+@event.listens_for(EmergencyContact, 'after_insert')
+@event.listens_for(EmergencyContact, 'after_update')
+@event.listens_for(EmergencyContact, 'after_delete')
+def invalidate_contact_set(mapper, connection, target):
+    invalidate_after_commit(db.session(), emergency_contact_cache, target.elderly_id)
+
+def parse_specializations(text):
+    """Split a free-text specializations field into normalized, de-duplicated names"""
+    names = []
+    for part in (text or '').split(','):
+        name = ' '.join(part.split()).lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def sync_specialization_tags(caregiver):
+    """Point a caregiver's tag rows at the names parsed from its specializations text"""
+    names = parse_specializations(caregiver.specializations)
+    existing = {
+        tag.name: tag for tag in Specialization.query.filter(Specialization.name.in_(names))
+    } if names else {}
+    caregiver.specialization_tags = [existing.get(name) or Specialization(name=name) for name in names]
+
+def backfill_specialization_tags():
+    """Parse every caregiver's specializations text into tag rows in bulk"""
+    caregivers = db.session.query(Caregiver.id, Caregiver.specializations).all()
+    parsed = {caregiver_id: parse_specializations(text) for caregiver_id, text in caregivers}
+
+    tag_ids = {name: tag_id for tag_id, name in db.session.query(Specialization.id, Specialization.name)}
+    missing = sorted({name for names in parsed.values() for name in names} - tag_ids.keys())
+    if missing:
+        db.session.execute(db.insert(Specialization), [{'name': name} for name in missing])
+        tag_ids = {name: tag_id for tag_id, name in db.session.query(Specialization.id, Specialization.name)}
+
+    db.session.execute(caregiver_specialization.delete())
+    links = [
+        {'caregiver_id': caregiver_id, 'specialization_id': tag_ids[name]}
+        for caregiver_id, names in parsed.items() for name in names
+    ]
+    if links:
+        db.session.execute(caregiver_specialization.insert(), links)
+    db.session.commit()
+    return len(links)
+
+# Full-text caregiver search (SQLite FTS5), rowid = caregiver.id
+caregiver_fts = table('caregiver_fts', column('rowid'), column('name'), column('specializations'))
+
+CAREGIVER_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS caregiver_fts
+       USING fts5(name, specializations, tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS caregiver_fts_insert AFTER INSERT ON caregiver BEGIN
+           INSERT INTO caregiver_fts (rowid, name, specializations)
+           SELECT new.id, "user".name, new.specializations FROM "user" WHERE "user".id = new.user_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS caregiver_fts_update AFTER UPDATE OF specializations, user_id ON caregiver BEGIN
+           DELETE FROM caregiver_fts WHERE rowid = old.id;
+           INSERT INTO caregiver_fts (rowid, name, specializations)
+           SELECT new.id, "user".name, new.specializations FROM "user" WHERE "user".id = new.user_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS caregiver_fts_delete AFTER DELETE ON caregiver BEGIN
+           DELETE FROM caregiver_fts WHERE rowid = old.id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS caregiver_fts_user_name AFTER UPDATE OF name ON "user" BEGIN
+           UPDATE caregiver_fts SET name = new.name
+           WHERE rowid IN (SELECT id FROM caregiver WHERE user_id = new.id);
+       END""",
+]
+
+def install_caregiver_search_index():
+    """Create the FTS5 table and sync triggers; returns True if the index was just created"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    created = not inspect(db.engine).has_table('caregiver_fts')
+    with db.engine.begin() as connection:
+        for ddl in CAREGIVER_FTS_DDL:
+            connection.execute(text(ddl))
+    return created
+
+def rebuild_caregiver_search_index():
+    """Repopulate the FTS5 index from the caregiver and user tables"""
+    db.session.execute(text('DELETE FROM caregiver_fts'))
+    db.session.execute(text(
+        'INSERT INTO caregiver_fts (rowid, name, specializations) '
+        'SELECT caregiver.id, "user".name, caregiver.specializations '
+        'FROM caregiver JOIN "user" ON "user".id = caregiver.user_id'
+    ))
+    db.session.commit()
+    return db.session.query(db.func.count(Caregiver.id)).scalar()
+
+def build_fts_query(q):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r'\w+', q.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def caregivers_with_specializations(names, match_all=False):
+    """Select caregiver ids tagged with any (or all) of the given normalized names"""
+    query = db.session.query(caregiver_specialization.c.caregiver_id)\
+        .join(Specialization, Specialization.id == caregiver_specialization.c.specialization_id)\
+        .filter(Specialization.name.in_(names))
+    if match_all:
+        query = query.group_by(caregiver_specialization.c.caregiver_id)\
+            .having(db.func.count(Specialization.id) == len(names))
+    return query
+
+# Initialize SocketIO after creating Flask app; with a message queue, emits from any worker
+# (or Celery task) reach sockets connected to every other worker
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
+
+def user_room(user_id):
+    """Room joined by every socket of a user, so an emit reaches all their devices on any worker"""
+    return f'user_{user_id}'
+
+class MemoryPresenceRegistry:
+    """Connected users and active calls, for a single process"""
+
+    def __init__(self):
+        self._sids = {}  # user id -> socket ids
+        self._calls = {}  # room id -> call state
+        self._lock = threading.Lock()
+
+    def connect(self, user_id, sid):
+        with self._lock:
+            self._sids.setdefault(user_id, set()).add(sid)
+
+    def disconnect(self, user_id, sid):
+        """Forget a socket; returns whether the user still has other sockets connected"""
+        with self._lock:
+            sids = self._sids.get(user_id, set())
+            sids.discard(sid)
+            if not sids:
+                self._sids.pop(user_id, None)
+            return bool(sids)
+
+    def refresh(self, sockets):
+        """Nothing expires in memory"""
+
+    def online(self, user_ids):
+        """The subset of `user_ids` with at least one socket connected"""
+        with self._lock:
+            return {user_id for user_id in user_ids if self._sids.get(user_id)}
+
+    def is_online(self, user_id):
+        return bool(self.online([user_id]))
+
+    def set_call(self, room_id, caller_id, callee_id, status='active'):
+        with self._lock:
+            self._calls[room_id] = {'caller_id': caller_id, 'callee_id': callee_id, 'status': status}
+
+    def get_call(self, room_id):
+        with self._lock:
+            return self._calls.get(room_id)
+
+    def pop_call(self, room_id):
+        """Remove and return a call's state; None if it was already ended"""
+        with self._lock:
+            return self._calls.pop(room_id, None)
+
+    def calls_for_user(self, user_id):
+        with self._lock:
+            return [room_id for room_id, call in self._calls.items()
+                    if user_id in (call['caller_id'], call['callee_id'])]
+
+class RedisPresenceRegistry:
+    """Connected users and active calls shared by every worker through Redis.
+
+    Each user's sockets are a sorted set scored by expiry time. Workers refresh the
+    sockets connected to them, so those of a crashed worker age out after `ttl`.
+    `client` is a redis.Redis or a compatible stand-in such as fakeredis.
+    """
 
-# In-memory storage for active calls
-active_calls = {}
-user_sid_mapping = {}  # Maps user_id to socket ID
+    def __init__(self, client, ttl, call_ttl, prefix='caremate'):
+        self.client = client
+        self.ttl = ttl
+        self.call_ttl = call_ttl
+        self.prefix = prefix
+
+    def _presence_key(self, user_id):
+        return f'{self.prefix}:presence:{user_id}'
+
+    def _call_key(self, room_id):
+        return f'{self.prefix}:call:{room_id}'
+
+    def _user_calls_key(self, user_id):
+        return f'{self.prefix}:user_calls:{user_id}'
+
+    @staticmethod
+    def _text(value):
+        return value.decode() if isinstance(value, bytes) else value
+
+    def connect(self, user_id, sid):
+        self.refresh([(user_id, sid)])
+
+    def disconnect(self, user_id, sid):
+        """Forget a socket; returns whether the user still has other sockets connected"""
+        key = self._presence_key(user_id)
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zrem(key, sid)
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zcount(key, now, '+inf')  # only sockets whose worker is still refreshing them
+        return pipe.execute()[-1] > 0
+
+    def refresh(self, sockets):
+        """Extend the expiry of (user id, socket id) pairs connected to this worker"""
+        if not sockets:
+            return
+        expires = time.time() + self.ttl
+        pipe = self.client.pipeline(transaction=False)
+        for user_id, sid in sockets:
+            pipe.zadd(self._presence_key(user_id), {sid: expires})
+            pipe.expire(self._presence_key(user_id), self.ttl)
+        pipe.execute()
+
+    def online(self, user_ids):
+        """The subset of `user_ids` with at least one unexpired socket"""
+        user_ids = list(user_ids)
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.zcount(self._presence_key(user_id), now, '+inf')
+        return {user_id for user_id, count in zip(user_ids, pipe.execute()) if count}
+
+    def is_online(self, user_id):
+        return bool(self.online([user_id]))
+
+    def set_call(self, room_id, caller_id, callee_id, status='active'):
+        pipe = self.client.pipeline()
+        pipe.hset(self._call_key(room_id), mapping={'caller_id': caller_id, 'callee_id': callee_id, 'status': status})
+        pipe.expire(self._call_key(room_id), self.call_ttl)
+        for user_id in (caller_id, callee_id):
+            pipe.sadd(self._user_calls_key(user_id), room_id)
+            pipe.expire(self._user_calls_key(user_id), self.call_ttl)
+        pipe.execute()
+
+    def _decode_call(self, data):
+        if not data:
+            return None
+        call = {self._text(key): self._text(value) for key, value in data.items()}
+        return {'caller_id': int(call['caller_id']), 'callee_id': int(call['callee_id']), 'status': call['status']}
+
+    def get_call(self, room_id):
+        return self._decode_call(self.client.hgetall(self._call_key(room_id)))
+
+    def pop_call(self, room_id):
+        """Remove and return a call's state; None if it was already ended (by any worker)"""
+        pipe = self.client.pipeline()  # MULTI/EXEC: only one caller gets the state back
+        pipe.hgetall(self._call_key(room_id))
+        pipe.delete(self._call_key(room_id))
+        call = self._decode_call(pipe.execute()[0])
+        if call:
+            pipe = self.client.pipeline(transaction=False)
+            for user_id in (call['caller_id'], call['callee_id']):
+                pipe.srem(self._user_calls_key(user_id), room_id)
+            pipe.execute()
+        return call
+
+    def calls_for_user(self, user_id):
+        return [self._text(room_id) for room_id in self.client.smembers(self._user_calls_key(user_id))]
+
+def create_presence_registry():
+    backend = app.config['PRESENCE_BACKEND']
+    if backend == 'redis':
+        client = redis.Redis.from_url(app.config['PRESENCE_REDIS_URL'], decode_responses=True)
+        return RedisPresenceRegistry(client, app.config['PRESENCE_TTL'], app.config['CALL_STATE_TTL'])
+    if backend != 'memory':
+        raise ValueError(f'Unknown PRESENCE_BACKEND {backend!r}; use memory or redis')
+    return MemoryPresenceRegistry()
+
+presence = create_presence_registry()
+connected_sockets = {}  # socket ID -> user ID, for sockets connected to this process
+# Held while registering, forgetting or refreshing sockets, so a refresh cannot
+# re-add a socket that disconnected after it took its copy of connected_sockets
+connected_sockets_lock = threading.Lock()
+sid_user_mapping = {}  # Maps socket ID to the ID of the user who connected it
+_presence_refresher_started = False
+
+def refresh_local_presence():
+    """Extend the expiry of every socket connected to this process"""
+    with connected_sockets_lock:
+        presence.refresh([(user_id, sid) for sid, user_id in connected_sockets.items()])
+
+def refresh_presence():
+    """Background loop keeping this process's sockets online in a shared registry"""
+    while True:
+        socketio.sleep(app.config['PRESENCE_TTL'] / 3)
+        try:
+            refresh_local_presence()
+        except Exception as e:
+            print(f"Presence refresh error: {str(e)}")
+
+def end_user_calls(user_id):
+    for room_id in presence.calls_for_user(user_id):
+        end_call(room_id)
+
+def end_user_calls_if_offline(user_id, delay):
+    """End a user's calls if they are offline once `delay` seconds have passed.
+
+    Sockets of a crashed worker stay in the registry until they expire, so a user whose
+    last live socket closed can look online for up to PRESENCE_TTL.
+    """
+    socketio.sleep(delay)
+    with app.app_context():
+        try:
+            if not presence.is_online(user_id):
+                end_user_calls(user_id)
+        except Exception as e:
+            print(f"Call cleanup error for user {user_id}: {str(e)}")
 
 # WebSocket event handlers
 @socketio.on('connect')
 def handle_connect():
     """Handle new WebSocket connections"""
+    global _presence_refresher_started
     try:
         # Get user from token in request headers
         current_user = get_current_user()
         if not current_user:
             return False  # Reject connection if not authenticated
         
-        # Store user's socket ID
-        user_sid_mapping[current_user.id] = request.sid
+        # Register the socket and join the user's room
+        with connected_sockets_lock:
+            connected_sockets[request.sid] = current_user.id
+            presence.connect(current_user.id, request.sid)
+        join_room(user_room(current_user.id))
+        if not _presence_refresher_started:
+            _presence_refresher_started = True
+            socketio.start_background_task(refresh_presence)
         print(f'User {current_user.id} connected with socket ID: {request.sid}')
         return True
     except Exception as e:
@@ -273,17 +1430,24 @@ def handle_connect():
 def handle_disconnect():
     """Handle WebSocket disconnections"""
     try:
-        current_user = get_current_user()
-        if current_user and current_user.id in user_sid_mapping:
-            # Clean up any active calls
-            for room_id, call_data in active_calls.items():
-                if current_user.id in [call_data['caller_id'], call_data['callee_id']]:
-                    end_call(room_id)
-            
-            del user_sid_mapping[current_user.id]
-            print(f'User {current_user.id} disconnected')
+        with connected_sockets_lock:
+            user_id = connected_sockets.pop(request.sid, None)
+            still_online = user_id is not None and presence.disconnect(user_id, request.sid)
+        if user_id is None:
+            return
+        if not still_online:
+            # The user's last socket: clean up their active calls
+            end_user_calls(user_id)
+            print(f'User {user_id} disconnected')
+        elif presence.calls_for_user(user_id):
+            # The other sockets may be stale ones of a crashed worker; look again once
+            # they would have expired
+            socketio.start_background_task(end_user_calls_if_offline, user_id,
+                                           app.config['PRESENCE_TTL'] + 1)
     except Exception as e:
         print(f"Disconnection error: {str(e)}")
+    finally:
+        sid_user_mapping.pop(request.sid, None)
 
 @socketio.on('join_call')
 def handle_join_call(data):
@@ -304,13 +1468,11 @@ def handle_join_call(data):
             return
         
         join_room(room_id)
-        active_calls[room_id] = {
-            'caller_id': call.caller_id,
-            'callee_id': call.callee_id,
-            'status': 'active'
-        }
+        presence.set_call(room_id, call.caller_id, call.callee_id)
         
         call.status = 'active'
+        if current_user.id == call.callee_id and not call.answered_at:
+            call.answered_at = datetime.utcnow()
         db.session.commit()
         
         emit('user_joined', {
@@ -328,7 +1490,7 @@ def handle_leave_call(data):
         room_id = data['room_id']
         current_user = get_current_user()
         
-        if room_id in active_calls:
+        if presence.get_call(room_id) is not None:
             end_call(room_id)
             
         leave_room(room_id)
@@ -385,12 +1547,12 @@ def end_call(room_id):
     try:
         call = Call.query.filter_by(room_id=room_id).first()
         if call:
-            call.status = 'ended'
+            # A call the callee never joined counts as missed
+            call.status = 'ended' if call.answered_at else 'missed'
             call.end_time = datetime.utcnow()
             db.session.commit()
         
-        if room_id in active_calls:
-            del active_calls[room_id]
+        presence.pop_call(room_id)
     except Exception as e:
         print(f"End call error: {str(e)}")
 
@@ -424,6 +1586,7 @@ def register():
         
         try:
             send_welcome_email(user)
+            send_mail_outbox()
         except Exception as e:
             print("Email sending failed:", str(e))  # Don't fail registration if email fails
         
@@ -507,6 +1670,7 @@ def caregiver_profile():
             profile.hourly_rate = data['hourly_rate']
             profile.experience_years = data['experience_years']
             profile.specializations = data['specializations']
+            sync_specialization_tags(profile)
         else:
             # Create new profile
             profile = Caregiver(
@@ -516,6 +1680,7 @@ def caregiver_profile():
                 specializations=data['specializations'],
                 verification_status=False
             )
+            sync_specialization_tags(profile)
             db.session.add(profile)
             
         db.session.commit()
@@ -529,7 +1694,7 @@ def create_review(caregiver_id):
     
     # Validate rating
     rating = data.get('rating')
-    if not rating or not (1 <= rating <= 5):
+    if not is_json_int(rating) or not (1 <= rating <= 5):
         return jsonify({'error': 'Rating must be between 1 and 5'}), 400
         
     # Check if user has already reviewed this caregiver
@@ -549,7 +1714,29 @@ def create_review(caregiver_id):
     )
     
     db.session.add(review)
-    db.session.commit()
+
+    # Update the caregiver's rating aggregates in the same transaction as the review
+    star_column = getattr(Caregiver, f'rating_{rating}_count')
+    updated = Caregiver.query.filter_by(id=caregiver_id).update({
+        Caregiver.rating_count: Caregiver.rating_count + 1,
+        Caregiver.rating_sum: Caregiver.rating_sum + rating,
+        star_column: star_column + 1
+    }, synchronize_session=False)
+    if not updated:
+        db.session.rollback()
+        return jsonify({'error': 'Caregiver not found'}), 404
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Concurrent duplicate submission hit the one-review-per-reviewer index
+        db.session.rollback()
+        return jsonify({'error': 'You have already reviewed this caregiver'}), 400
+
+    try:
+        schedule_leaderboard_refresh()
+    except Exception as e:
+        print(f"Failed to schedule leaderboard refresh: {str(e)}")  # Beat job will catch up
     
     return jsonify({
         'message': 'Review added successfully',
@@ -568,126 +1755,492 @@ def search_caregivers():
     max_rate = request.args.get('max_rate', type=float)
     min_experience = request.args.get('min_experience', type=int)
     min_rating = request.args.get('min_rating', type=float)
-    specialization = request.args.get('specialization')
+    # Repeated or comma separated, e.g. specialization=dementia care,night shift
+    specializations = parse_specializations(','.join(request.args.getlist('specialization')))
+    match = request.args.get('match', 'all')  # all (AND) or any (OR) of the specializations
     verified_only = request.args.get('verified_only', type=bool, default=False)
-    sort_by = request.args.get('sort_by', 'rating')  # rating, price, experience
-    
+    q = request.args.get('q', '').strip()  # free text over names and specializations
+    sort_by = request.args.get('sort_by', 'relevance' if q else 'rating')  # relevance, rating, price, experience
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+
     # Start with base query
-    query = db.session.query(Caregiver, User).join(User)
-    
+    average_rating = Caregiver.average_rating
+    query = db.session.query(Caregiver, User.name, User.phone)\
+        .join(User, User.id == Caregiver.user_id)
+
+    relevance = None
+    if q:
+        fts_query = build_fts_query(q)
+        if not fts_query:
+            return jsonify({'error': 'Search query must contain letters or digits'}), 400
+        fts_table = db.literal_column('caregiver_fts')
+        matches = db.select(
+            caregiver_fts.c.rowid.label('caregiver_id'),
+            # BM25 is lower-is-better; names weigh more than specializations
+            db.func.bm25(fts_table, 2.0, 1.0).label('relevance')
+        ).where(fts_table.op('MATCH')(fts_query)).subquery()
+        query = query.join(matches, matches.c.caregiver_id == Caregiver.id)
+        relevance = matches.c.relevance
+
     # Apply filters
     if max_rate:
         query = query.filter(Caregiver.hourly_rate <= max_rate)
     if min_experience:
         query = query.filter(Caregiver.experience_years >= min_experience)
-    if specialization:
-        query = query.filter(Caregiver.specializations.like(f'%{specialization}%'))
+    if specializations:
+        query = query.filter(Caregiver.id.in_(
+            caregivers_with_specializations(specializations, match_all=match != 'any')
+        ))
     if verified_only:
         query = query.filter(Caregiver.verification_status == True)
-    
-    caregivers = query.all()
-    
-    # Post-process to include ratings and apply rating filter
-    result = []
-    for caregiver in caregivers:
-        avg_rating = caregiver.Caregiver.average_rating
-        if min_rating and avg_rating < min_rating:
-            continue
-            
-        result.append({
-            'id': caregiver.Caregiver.id,
-            'name': caregiver.User.name,
-            'phone': caregiver.User.phone,
-            'hourly_rate': caregiver.Caregiver.hourly_rate,
-            'experience_years': caregiver.Caregiver.experience_years,
-            'specializations': caregiver.Caregiver.specializations,
-            'verification_status': caregiver.Caregiver.verification_status,
-            'average_rating': avg_rating,
-            'total_reviews': len(caregiver.Caregiver.reviews)
-        })
-    
-    # Sort results
-    if sort_by == 'rating':
-        result.sort(key=lambda x: x['average_rating'], reverse=True)
-    elif sort_by == 'price':
-        result.sort(key=lambda x: x['hourly_rate'])
+    if min_rating:
+        query = query.filter(average_rating >= min_rating)
+
+    # Sort order always ends on the primary key so pages are stable
+    if sort_by == 'price':
+        order = [(Caregiver.hourly_rate, False)]
     elif sort_by == 'experience':
-        result.sort(key=lambda x: x['experience_years'], reverse=True)
-    
-    return jsonify(result)
+        order = [(db.func.coalesce(Caregiver.experience_years, 0), True)]
+    elif sort_by == 'relevance' and relevance is not None:
+        order = [(relevance, False)]
+    else:
+        order = [(average_rating, True)]
+    order.append((Caregiver.id, False))
+    query = query.add_columns(order[0][0].label('sort_key'))
+
+    total = query.count() if include_total else None
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if values is None or len(values) != len(order):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(keyset_filter(order, values))
+
+    query = query.order_by(*keyset_order_by(order))
+    if not cursor:
+        query = query.offset((page - 1) * per_page)
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    result = [{
+        'id': row.Caregiver.id,
+        'name': row.name,
+        'phone': row.phone,
+        'hourly_rate': row.Caregiver.hourly_rate,
+        'experience_years': row.Caregiver.experience_years,
+        'specializations': row.Caregiver.specializations,
+        'verification_status': row.Caregiver.verification_status,
+        'average_rating': row.Caregiver.average_rating,
+        'total_reviews': row.Caregiver.rating_count
+    } for row in rows]
+    if sort_by == 'relevance' and relevance is not None:
+        for item, row in zip(result, rows):
+            item['relevance'] = -row.sort_key
+
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor([rows[-1].sort_key, rows[-1].Caregiver.id])
+
+    response = {
+        'caregivers': result,
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': next_cursor
+    }
+    if not cursor:
+        response['page'] = page
+    if include_total:
+        response['total'] = total
+    return jsonify(response)
+
+@app.route('/api/caregivers/specializations', methods=['GET'])
+@api_login_required
+def get_specialization_facets():
+    """Caregiver counts per specialization for the marketplace filter"""
+    verified_only = request.args.get('verified_only', type=bool, default=False)
+
+    query = db.session.query(
+        Specialization.name,
+        db.func.count(caregiver_specialization.c.caregiver_id).label('count')
+    ).join(caregiver_specialization, caregiver_specialization.c.specialization_id == Specialization.id)
+    if verified_only:
+        query = query.join(Caregiver, Caregiver.id == caregiver_specialization.c.caregiver_id)\
+            .filter(Caregiver.verification_status == True)
+    facets = query.group_by(Specialization.id)\
+        .order_by(db.desc('count'), Specialization.name)\
+        .all()
+
+    return jsonify([{'name': name, 'count': count} for name, count in facets])
 
 @app.route('/api/caregivers/<int:caregiver_id>/rating', methods=['GET'])
 @api_login_required
 def get_rating_summary(caregiver_id):
-    reviews = Review.query.filter_by(caregiver_id=caregiver_id).all()
-    
-    if not reviews:
-        return jsonify({
-            'average_rating': 0,
-            'total_reviews': 0,
-            'rating_distribution': {str(i): 0 for i in range(1, 6)}
-        })
-    
-    # Calculate rating distribution
-    distribution = {str(i): 0 for i in range(1, 6)}
-    for review in reviews:
-        distribution[str(review.rating)] += 1
-    
+    caregiver = Caregiver.query.get_or_404(caregiver_id)
+
     return jsonify({
-        'average_rating': sum(r.rating for r in reviews) / len(reviews),
-        'total_reviews': len(reviews),
-        'rating_distribution': distribution
+        'average_rating': caregiver.average_rating,
+        'total_reviews': caregiver.rating_count,
+        'rating_distribution': caregiver.rating_distribution
     })
 
 # Task Management Routes
-@app.route('/api/tasks', methods=['GET'])
-@api_login_required
-def get_tasks():
-    current_user = get_current_user()
-    # For elderly users: get their own tasks
-    # For family/caregivers: get tasks of associated elderly users
-    if current_user.user_type == 'elderly':
-        tasks = Task.query.filter_by(user_id=current_user.id).all()
-    else:
-        # TODO: Implement logic to get tasks for associated elderly users
-        tasks = Task.query.filter_by(user_id=current_user.id).all()
-    
-    return jsonify([{
+TASK_SCHEMA = RowSchema(
+    ('id', Task.id),
+    ('user_id', Task.user_id),
+    ('title', Task.title),
+    ('description', Task.description),
+    ('due_time', Task.due_time),
+    ('is_completed', Task.is_completed),
+    ('task_type', Task.task_type),
+    ('recurrence', Task.recurrence),
+    ('recurrence_until', Task.recurrence_until)
+)
+UPCOMING_TASK_SCHEMA = RowSchema(
+    ('id', Task.id),
+    ('title', Task.title),
+    ('description', Task.description),
+    ('due_time', Task.due_time),
+    ('task_type', Task.task_type),
+    ('recurrence', Task.recurrence)
+)
+
+# Recurrence rules: a subset of RFC 5545 RRULE (FREQ, INTERVAL, BYDAY, UNTIL)
+RECURRENCE_FREQUENCIES = {
+    'HOURLY': timedelta(hours=1),
+    'DAILY': timedelta(days=1),
+    'WEEKLY': timedelta(weeks=1)
+}
+WEEKDAY_CODES = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+def parse_rrule_until(value):
+    """UNTIL as RRULE basic format (20250131T090000Z) or ISO 8601"""
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value)
+
+def parse_recurrence(rule):
+    """Parse an RRULE string into (normalized rule, until); raises ValueError if invalid"""
+    parts = {}
+    for part in rule.strip().removeprefix('RRULE:').split(';'):
+        key, sep, value = part.partition('=')
+        if not sep or key.strip().upper() not in ('FREQ', 'INTERVAL', 'BYDAY', 'UNTIL'):
+            raise ValueError(f'Unsupported recurrence part: {part}')
+        parts[key.strip().upper()] = value.strip()
+
+    freq = parts.get('FREQ', '').upper()
+    if freq not in RECURRENCE_FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(RECURRENCE_FREQUENCIES)}")
+    interval = int(parts.get('INTERVAL', 1))
+    if interval < 1:
+        raise ValueError('INTERVAL must be a positive integer')
+    normalized = f'FREQ={freq};INTERVAL={interval}'
+    if 'BYDAY' in parts:
+        if freq != 'WEEKLY':
+            raise ValueError('BYDAY is only supported with FREQ=WEEKLY')
+        days = {day.strip().upper() for day in parts['BYDAY'].split(',')}
+        if not days or not days <= set(WEEKDAY_CODES):
+            raise ValueError(f"BYDAY must list days out of {','.join(WEEKDAY_CODES)}")
+        normalized += f";BYDAY={','.join(code for code in WEEKDAY_CODES if code in days)}"
+    until = parse_rrule_until(parts['UNTIL']) if 'UNTIL' in parts else None
+    return normalized, until
+
+@lru_cache(maxsize=1024)
+def recurrence_step(rule):
+    """(step, weekday offsets) of a normalized rule; offsets are empty unless BYDAY is set"""
+    parts = dict(part.split('=') for part in rule.split(';'))
+    step = RECURRENCE_FREQUENCIES[parts['FREQ']] * int(parts['INTERVAL'])
+    weekdays = tuple(WEEKDAY_CODES.index(code) for code in parts['BYDAY'].split(',')) if 'BYDAY' in parts else ()
+    return step, weekdays
+
+def expand_occurrences(dtstart, rule, until, start, end):
+    """Occurrence times of a series within [start, end], in order.
+
+    Jumps straight to the first period at or after `start` instead of stepping from
+    `dtstart`, so the cost depends on the window, not on how long the series has run.
+    """
+    end = min(end, until) if until else end
+    start = max(start, dtstart)
+    if start > end:
+        return
+    step, weekdays = recurrence_step(rule)
+    if not weekdays:
+        occurrence = dtstart - (dtstart - start) // step * step  # first one at or after start
+        while occurrence <= end:
+            yield occurrence
+            occurrence += step
+        return
+
+    # BYDAY: periods start on the Monday of dtstart's week, at dtstart's time of day
+    period = dtstart - timedelta(days=dtstart.weekday())
+    period += (start - period) // step * step
+    while period <= end:
+        for weekday in weekdays:
+            occurrence = period + timedelta(days=weekday)
+            if occurrence > end:
+                return
+            if occurrence >= start:
+                yield occurrence
+        period += step
+
+def reschedule_occurrences(changes):
+    """Carry stored occurrence state over to the new schedules of edited series.
+
+    `changes` maps task id -> (old, new) schedule, each (due_time, recurrence,
+    recurrence_until). Completed occurrences move with the start time, within their own
+    period (yesterday's 8:00 dose stays yesterday's and done when the series moves to
+    9:00); those that are no occurrence of the new schedule are dropped, so no rows are
+    left keyed to times that no longer exist.
+    """
+    changes = {task_id: (old, new) for task_id, (old, new) in changes.items() if old[1] and old != new}
+    if not changes:
+        return
+    rows = db.session.execute(
+        db.select(TaskOccurrence.task_id, TaskOccurrence.occurrence_time, TaskOccurrence.is_completed,
+                  TaskOccurrence.completed_at)
+        .where(TaskOccurrence.task_id.in_(changes))
+    ).all()
+    kept = []
+    for row in rows:
+        (old_start, _, _), (new_start, rule, until) = changes[row.task_id]
+        if not rule:
+            continue
+        # The shift closest to zero that keeps the start on the new schedule's grid
+        step, weekdays = recurrence_step(rule)
+        period = timedelta(days=1) if weekdays else step
+        shift = (new_start - old_start) % period
+        if shift > period / 2:
+            shift -= period
+        moved = row.occurrence_time + shift
+        if next(expand_occurrences(new_start, rule, until, moved, moved), None) is not None:
+            kept.append({'task_id': row.task_id, 'occurrence_time': moved,
+                         'is_completed': row.is_completed, 'completed_at': row.completed_at})
+    # Replace rather than update in place: shifted times may pass through each other
+    TaskOccurrence.query.filter(TaskOccurrence.task_id.in_(changes)).delete(synchronize_session=False)
+    if kept:
+        db.session.execute(db.insert(TaskOccurrence), kept)
+
+def recurrence_args(data, task=None):
+    """(recurrence, recurrence_until) from a task payload, defaulting to the task's current
+    values; raises ValueError if invalid. `recurrence` is an RRULE string or null and
+    `recurrence_until` (ISO) overrides its UNTIL."""
+    rule, until = (task.recurrence, task.recurrence_until) if task else (None, None)
+    if 'recurrence' in data:
+        rule, until = parse_recurrence(str(data['recurrence'])) if data['recurrence'] else (None, None)
+    if 'recurrence_until' in data:
+        until = datetime.fromisoformat(data['recurrence_until']) if data['recurrence_until'] else None
+    return rule, (until if rule else None)
+
+def validate_task_fields(data, task=None):
+    """Validate a task payload, returning (Task column values, error message).
+
+    Without `task` this is a new task and title, due_time and task_type are required;
+    with it (anything carrying recurrence and recurrence_until) only the given fields are
+    validated and returned.
+    """
+    if not isinstance(data, dict):
+        return None, 'Task must be a JSON object'
+    if task is None:
+        missing = [field for field in ('title', 'due_time', 'task_type') if not data.get(field)]
+        if missing:
+            return None, f"Missing required fields: {', '.join(missing)}"
+
+    values = {}
+    for field, max_length in (('title', 100), ('task_type', 20), ('description', None)):
+        if field not in data:
+            continue
+        value = data[field]
+        if field == 'description' and value is None:
+            value = ''
+        if not isinstance(value, str) or (max_length and not 0 < len(value) <= max_length):
+            return None, f'{field} must be a string' + (f' of 1 to {max_length} characters' if max_length else '')
+        values[field] = value
+    if 'due_time' in data:
+        try:
+            values['due_time'] = datetime.fromisoformat(data['due_time'])
+        except (TypeError, ValueError):
+            return None, 'due_time must be an ISO 8601 timestamp'
+    if 'is_completed' in data:
+        if not isinstance(data['is_completed'], bool):
+            return None, 'is_completed must be true or false'
+        values['is_completed'] = data['is_completed']
+    try:
+        values['recurrence'], values['recurrence_until'] = recurrence_args(data, task)
+    except (TypeError, ValueError) as e:
+        return None, f'Invalid recurrence: {e}'
+    return values, None
+
+TASK_ORDER = [(Task.due_time, False), (Task.id, False)]
+
+def task_window(user_ids, start, end, completed=None, clauses=(), order=TASK_ORDER, after=None, limit=None):
+    """Task dicts (TASK_SCHEMA keys) of `user_ids` due within [start, end], sorted by `order`.
+
+    One-off tasks come from an indexed range query; recurring series overlapping the
+    window are expanded into one dict per occurrence, with completion looked up in the
+    sparse TaskOccurrence table for the window only. `completed` filters on (occurrence)
+    completion and `clauses` are extra filters on Task. `order` is ascending columns
+    whose keys are TASK_SCHEMA keys; `after` (a sort key to continue from) and `limit`
+    support keyset pagination.
+    """
+    keys = [column.key for column, _ in order]
+    sort_key = lambda task: tuple(task[key] for key in keys)
+
+    one_offs = TASK_SCHEMA.select().where(
+        Task.user_id.in_(user_ids),
+        Task.recurrence.is_(None),
+        Task.due_time >= start,
+        Task.due_time <= end,
+        *clauses
+    ).order_by(*keyset_order_by(order))
+    if completed is not None:
+        one_offs = one_offs.where(Task.is_completed == completed)
+    if after:
+        one_offs = one_offs.where(keyset_filter(order, after))
+    if limit:
+        one_offs = one_offs.limit(limit)
+    tasks = TASK_SCHEMA.dicts(db.session.execute(one_offs))
+
+    series = TASK_SCHEMA.dicts(db.session.execute(TASK_SCHEMA.select().where(
+        Task.user_id.in_(user_ids),
+        Task.recurrence.isnot(None),
+        Task.is_completed == False,
+        Task.due_time <= end,
+        db.or_(Task.recurrence_until.is_(None), Task.recurrence_until >= start),
+        *clauses
+    )))
+    if series:
+        done = set(db.session.execute(
+            db.select(TaskOccurrence.task_id, TaskOccurrence.occurrence_time).where(
+                TaskOccurrence.task_id.in_([task['id'] for task in series]),
+                TaskOccurrence.occurrence_time >= start,
+                TaskOccurrence.occurrence_time <= end,
+                TaskOccurrence.is_completed == True
+            )
+        ).all())
+        # Occurrences before the cursor's due time can be skipped when sorting by due time
+        lower = max(start, after[0]) if after and keys[0] == 'due_time' else start
+        for task in series:
+            occurrences = (
+                {**task, 'due_time': due_time, 'is_completed': (task['id'], due_time) in done}
+                for due_time in expand_occurrences(task['due_time'], task['recurrence'],
+                                                   task['recurrence_until'], lower, end)
+            )
+            if after:
+                occurrences = (occurrence for occurrence in occurrences if sort_key(occurrence) > tuple(after))
+            if completed is not None:
+                occurrences = (occurrence for occurrence in occurrences if occurrence['is_completed'] == completed)
+            tasks.extend(islice(occurrences, limit) if limit else occurrences)
+        tasks.sort(key=sort_key)
+    return tasks[:limit] if limit else tasks
+
+def task_window_page(user_ids, start, end, per_page, cursor, include_total, order=TASK_ORDER, **filters):
+    """One keyset page of task_window(); returns (tasks, next_cursor, total), or raises
+    ValueError for a malformed cursor"""
+    after = decode_keyset_cursor(cursor, order) if cursor else None
+    if cursor and after is None:
+        raise ValueError('Invalid cursor')
+    tasks = task_window(user_ids, start, end, order=order, after=after, limit=per_page + 1, **filters)
+    next_cursor = None
+    if len(tasks) > per_page:
+        tasks = tasks[:per_page]
+        next_cursor = encode_cursor([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (tasks[-1][column.key] for column, _ in order)
+        ])
+    total = len(task_window(user_ids, start, end, **filters)) if include_total else None
+    return tasks, next_cursor, total
+
+def task_window_args():
+    """(start, end) from the query string, or (None, None) when no window was asked for;
+    raises ValueError if invalid"""
+    if 'start' not in request.args and 'end' not in request.args:
+        return None, None
+    start = datetime.fromisoformat(request.args['start']) if 'start' in request.args else datetime.utcnow()
+    end = datetime.fromisoformat(request.args['end']) if 'end' in request.args else start + timedelta(days=7)
+    if end < start:
+        raise ValueError('end must not be before start')
+    if end - start > timedelta(days=app.config['TASK_WINDOW_MAX_DAYS']):
+        raise ValueError(f"Window is limited to {app.config['TASK_WINDOW_MAX_DAYS']} days")
+    return start, end
+
+def serialize_task(task):
+    return {
         'id': task.id,
         'title': task.title,
         'description': task.description,
         'due_time': task.due_time.isoformat(),
         'is_completed': task.is_completed,
-        'task_type': task.task_type
-    } for task in tasks])
+        'task_type': task.task_type,
+        'recurrence': task.recurrence,
+        'recurrence_until': task.recurrence_until.isoformat() if task.recurrence_until else None
+    }
+
+@app.route('/api/tasks', methods=['GET'])
+@api_login_required
+def get_tasks():
+    current_user = get_current_user()
+    # For elderly users: get their own tasks
+    # For family/caregivers: their own plus those of the elderly users on whose care team they are
+    user_ids = [current_user.id]
+    if current_user.user_type != 'elderly':
+        user_ids += care_team_patient_ids(current_user.id)
+    query = TASK_SCHEMA.select().where(Task.user_id.in_(user_ids))
+    order = TASK_ORDER
+    try:
+        start, end = task_window_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    paginated = 'per_page' in request.args or 'cursor' in request.args
+
+    if start is not None:
+        # Window given: recurring tasks are expanded into their occurrences within it
+        if not paginated:
+            return json_response(task_window(user_ids, start, end))
+        try:
+            tasks, next_cursor, total = task_window_page(user_ids, start, end, *pagination_args())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return json_response(tasks, headers=pagination_headers(next_cursor, total))
+
+    # Paginated only when asked for; otherwise every task is returned as before
+    if not paginated:
+        return json_response(TASK_SCHEMA.dicts(db.session.execute(query.order_by(*keyset_order_by(order)))))
+
+    per_page, cursor, include_total = pagination_args()
+    after = decode_keyset_cursor(cursor, order) if cursor else None
+    if cursor and after is None:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    rows, next_cursor, total = keyset_page(query, order, per_page, after, include_total)
+    return json_response(TASK_SCHEMA.dicts(rows), headers=pagination_headers(next_cursor, total))
 
 @app.route('/api/tasks', methods=['POST'])
 @api_login_required
 def create_task():
     current_user = get_current_user()
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    values, error = validate_task_fields(data)
+    if error:
+        return jsonify({'error': error}), 400
     
-    task = Task(
-        user_id=data.get('user_id', current_user.id),  # Allow creating tasks for other users
-        title=data['title'],
-        description=data.get('description', ''),
-        due_time=datetime.fromisoformat(data['due_time']),
-        task_type=data['task_type'],
-        is_completed=False
-    )
+    # Tasks can be created for care team patients too
+    user_id = data.get('user_id', current_user.id)
+    if not is_json_int(user_id):
+        return jsonify({'error': 'user_id must be an integer'}), 400
+    if not can_manage_tasks(current_user, user_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    task = Task(user_id=user_id, **{'description': '', **values, 'is_completed': False})
     
     db.session.add(task)
     db.session.commit()
-    send_task_reminder_email(User.query.get(task.user_id), task)
     
-    return jsonify({
-        'id': task.id,
-        'title': task.title,
-        'description': task.description,
-        'due_time': task.due_time.isoformat(),
-        'is_completed': task.is_completed,
-        'task_type': task.task_type
-    }), 201
+    return jsonify(serialize_task(task)), 201
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 @api_login_required
@@ -696,26 +2249,56 @@ def update_task(task_id):
     task = Task.query.get_or_404(task_id)
     
     # Check if user has permission to update this task
-    if task.user_id != current_user.id and current_user.user_type not in ['family', 'caregiver']:
+    if not can_manage_tasks(current_user, task.user_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
-    data = request.get_json()
-    task.title = data.get('title', task.title)
-    task.description = data.get('description', task.description)
-    task.due_time = datetime.fromisoformat(data['due_time']) if 'due_time' in data else task.due_time
-    task.is_completed = data.get('is_completed', task.is_completed)
-    task.task_type = data.get('task_type', task.task_type)
+    # Same validation as the bulk endpoints; nothing changes unless the whole payload is valid
+    values, error = validate_task_fields(request.get_json(silent=True), task)
+    if error:
+        return jsonify({'error': error}), 400
+    schedule = (task.due_time, task.recurrence, task.recurrence_until)
+    for field, value in values.items():  # is_completed on a series ends it
+        setattr(task, field, value)
+    reschedule_occurrences({task.id: (schedule, (task.due_time, task.recurrence, task.recurrence_until))})
     
     db.session.commit()
     
-    return jsonify({
-        'id': task.id,
-        'title': task.title,
-        'description': task.description,
-        'due_time': task.due_time.isoformat(),
-        'is_completed': task.is_completed,
-        'task_type': task.task_type
-    })
+    return jsonify(serialize_task(task))
+
+@app.route('/api/tasks/<int:task_id>/occurrences/<occurrence>', methods=['PUT'])
+@api_login_required
+def update_task_occurrence(task_id, occurrence):
+    """Mark one occurrence of a recurring task (identified by its due time) done or not done"""
+    current_user = get_current_user()
+    task = Task.query.get_or_404(task_id)
+    if not can_manage_tasks(current_user, task.user_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    if not task.recurrence:
+        return jsonify({'error': 'Task is not recurring'}), 400
+    try:
+        due_time = datetime.fromisoformat(occurrence)
+    except ValueError:
+        return jsonify({'error': 'Invalid occurrence time'}), 400
+    if next(expand_occurrences(task.due_time, task.recurrence, task.recurrence_until, due_time, due_time), None) is None:
+        return jsonify({'error': 'No occurrence of this task at that time'}), 404
+
+    is_completed = (request.get_json(silent=True) or {}).get('is_completed', True)
+    if not isinstance(is_completed, bool):
+        return jsonify({'error': 'is_completed must be true or false'}), 400
+    if is_completed:
+        stmt = sqlite_insert(TaskOccurrence.__table__).values(
+            task_id=task.id, occurrence_time=due_time, is_completed=True, completed_at=datetime.utcnow()
+        )
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['task_id', 'occurrence_time'],
+            set_={'is_completed': True, 'completed_at': stmt.excluded.completed_at}
+        ))
+    else:
+        # Pending is the default, so un-completing just drops the row
+        TaskOccurrence.query.filter_by(task_id=task.id, occurrence_time=due_time).delete()
+    db.session.commit()
+
+    return jsonify({'id': task.id, 'due_time': due_time.isoformat(), 'is_completed': is_completed})
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 @api_login_required
@@ -724,9 +2307,11 @@ def delete_task(task_id):
     task = Task.query.get_or_404(task_id)
     
     # Check if user has permission to delete this task
-    if task.user_id != current_user.id and current_user.user_type not in ['family', 'caregiver']:
+    if not can_manage_tasks(current_user, task.user_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
+    TaskReminder.query.filter_by(task_id=task.id).delete()
+    TaskOccurrence.query.filter_by(task_id=task.id).delete()
     db.session.delete(task)
     db.session.commit()
     
@@ -736,33 +2321,847 @@ def delete_task(task_id):
 @api_login_required
 def get_upcoming_tasks():
     current_user = get_current_user()
-    # Get tasks due in the next 24 hours
-    upcoming_tasks = Task.query.filter(
-        Task.user_id == current_user.id,
-        Task.due_time >= datetime.utcnow(),
-        Task.due_time <= datetime.utcnow() + timedelta(days=1),
-        Task.is_completed == False
-    ).order_by(Task.due_time).all()
+    # Get tasks due in the next 24 hours, including occurrences of recurring tasks
+    now = datetime.utcnow()
+    tasks = task_window([current_user.id], now, now + timedelta(days=1), completed=False)
+    keys = UPCOMING_TASK_SCHEMA.keys
     
-    return jsonify([{
-        'id': task.id,
-        'title': task.title,
-        'description': task.description,
-        'due_time': task.due_time.isoformat(),
-        'task_type': task.task_type
-    } for task in upcoming_tasks])
+    return json_response([{key: task[key] for key in keys} for task in tasks])
+
+# Care teams: caregivers and family members linked to an elderly user follow their tasks
+CARE_TEAM_ROLES = ['caregiver', 'family']
+TASK_STATUSES = {'all': None, 'pending': False, 'completed': True}
+
+def care_team_patient_ids(member_id):
+    """Ids of the elderly users on whose care team `member_id` is"""
+    return list(db.session.scalars(
+        db.select(CareTeamMember.elderly_id).where(CareTeamMember.member_id == member_id)
+    ))
+
+def can_access_patient(user, patient_id):
+    """Whether `user` may see and manage the data of `patient_id`: their own or a care team patient's"""
+    return user.id == patient_id or db.session.scalar(db.select(CareTeamMember.id).where(
+        CareTeamMember.elderly_id == patient_id,
+        CareTeamMember.member_id == user.id
+    )) is not None
+
+def can_manage_tasks(user, patient_id):
+    """Whether `user` may manage the tasks of `patient_id` (see can_access_patient)"""
+    return can_access_patient(user, patient_id)
+
+def care_team_patients(member_id):
+    """[{'id', 'name', 'role'}] of the member's patients, by name"""
+    rows = db.session.execute(
+        db.select(User.id, User.name, CareTeamMember.role)
+        .join(CareTeamMember, CareTeamMember.elderly_id == User.id)
+        .where(CareTeamMember.member_id == member_id)
+        .order_by(User.name, User.id)
+    )
+    return [{'id': row.id, 'name': row.name, 'role': row.role} for row in rows]
+
+@app.route('/api/care-team', methods=['GET'])
+@api_login_required
+def get_care_team():
+    """Elderly users get their care team members; caregivers and family get their patients"""
+    current_user = get_current_user()
+    if current_user.user_type != 'elderly':
+        return jsonify({'patients': care_team_patients(current_user.id)})
+
+    rows = db.session.execute(
+        db.select(User.id, User.name, User.email, User.phone, User.user_type,
+                  CareTeamMember.role, CareTeamMember.created_at)
+        .join(CareTeamMember, CareTeamMember.member_id == User.id)
+        .where(CareTeamMember.elderly_id == current_user.id)
+        .order_by(CareTeamMember.created_at)
+    )
+    return jsonify({'members': [{
+        'id': row.id,
+        'name': row.name,
+        'email': row.email,
+        'phone': row.phone,
+        'user_type': row.user_type,
+        'role': row.role,
+        'since': row.created_at.isoformat()
+    } for row in rows]})
+
+@app.route('/api/care-team', methods=['POST'])
+@api_login_required
+def add_care_team_member():
+    """Link an existing caregiver or family account (by email) to the elderly user's care team"""
+    current_user = get_current_user()
+    if current_user.user_type != 'elderly':
+        return jsonify({'error': 'Only elderly users can add care team members'}), 403
+    data = request.get_json(silent=True) or {}
+    member = User.query.filter_by(email=data.get('email')).first()
+    if not member:
+        return jsonify({'error': 'No user with that email'}), 404
+    if member.user_type not in CARE_TEAM_ROLES:
+        return jsonify({'error': 'Care team members must be caregivers or family'}), 400
+    role = data.get('role', member.user_type)
+    if role not in CARE_TEAM_ROLES:
+        return jsonify({'error': f"Role must be one of: {', '.join(CARE_TEAM_ROLES)}"}), 400
+
+    db.session.add(CareTeamMember(elderly_id=current_user.id, member_id=member.id, role=role))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Already on the care team'}), 409
+
+    return jsonify({
+        'message': 'Care team member added successfully',
+        'member': {'id': member.id, 'name': member.name, 'role': role}
+    }), 201
+
+@app.route('/api/care-team/<int:user_id>', methods=['DELETE'])
+@api_login_required
+def remove_care_team_member(user_id):
+    """Elderly users remove a member; members leave a patient's care team"""
+    current_user = get_current_user()
+    deleted = CareTeamMember.query.filter(db.or_(
+        db.and_(CareTeamMember.elderly_id == current_user.id, CareTeamMember.member_id == user_id),
+        db.and_(CareTeamMember.elderly_id == user_id, CareTeamMember.member_id == current_user.id)
+    )).delete(synchronize_session=False)
+    db.session.commit()
+    if not deleted:
+        return jsonify({'error': 'Not on the care team'}), 404
+    return jsonify({'message': 'Care team member removed successfully'})
+
+@app.route('/api/care-team/tasks', methods=['GET'])
+@api_login_required
+def get_care_team_tasks():
+    """Tasks of every patient on the caller's care team within a window (default: the next
+    7 days), recurring ones expanded, in one keyset-paginated list.
+
+    Filters: patient_id, status (all/pending/completed), type, start/end. With
+    group_by=patient the page is ordered by patient and returned as per-patient groups.
+    """
+    current_user = get_current_user()
+    patients = care_team_patients(current_user.id)
+    patient_id = request.args.get('patient_id', type=int)
+    if patient_id is not None:
+        patients = [patient for patient in patients if patient['id'] == patient_id]
+        if not patients:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+    status = request.args.get('status', 'all')
+    if status not in TASK_STATUSES:
+        return jsonify({'error': f"Status must be one of: {', '.join(TASK_STATUSES)}"}), 400
+    clauses = [Task.task_type == request.args['type']] if request.args.get('type') else []
+    try:
+        start, end = task_window_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if start is None:
+        start = datetime.utcnow()
+        end = start + timedelta(days=7)
+
+    grouped = request.args.get('group_by') == 'patient'
+    order = [(Task.user_id, False), *TASK_ORDER] if grouped else TASK_ORDER
+    per_page, cursor, include_total = pagination_args(default_per_page=50)
+    try:
+        tasks, next_cursor, total = task_window_page(
+            [patient['id'] for patient in patients], start, end, per_page, cursor, include_total,
+            order=order, completed=TASK_STATUSES[status], clauses=clauses
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = {
+        'patients': patients,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'per_page': per_page,
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor
+    }
+    if grouped:
+        groups = []
+        for task in tasks:
+            if not groups or groups[-1]['patient_id'] != task['user_id']:
+                groups.append({'patient_id': task['user_id'], 'tasks': []})
+            groups[-1]['tasks'].append(task)
+        response['groups'] = groups
+    else:
+        response['tasks'] = tasks
+    if total is not None:
+        response['total'] = total
+    return json_response(response)
+
+@app.route('/api/care-team/tasks/upcoming', methods=['GET'])
+@api_login_required
+def get_care_team_upcoming_tasks():
+    """Pending tasks due in the next 24 hours for every patient on the caller's care team"""
+    current_user = get_current_user()
+    patients = care_team_patients(current_user.id)
+    now = datetime.utcnow()
+    by_patient = {patient['id']: [] for patient in patients}
+    keys = UPCOMING_TASK_SCHEMA.keys
+    for task in task_window(list(by_patient), now, now + timedelta(days=1), completed=False):
+        by_patient[task['user_id']].append({key: task[key] for key in keys})
+
+    return json_response({'patients': [{**patient, 'tasks': by_patient[patient['id']]} for patient in patients]})
+
+# Bulk task operations: one transaction and a handful of statements per request, with a
+# result per item. Reminders need no per-task scheduling; the periodic scan picks new and
+# moved tasks up.
+app.config['TASK_BULK_MAX_ITEMS'] = 500
+
+def is_json_int(value):
+    """Whether a JSON value is an integer (JSON true/false decode to bool, an int subclass)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def manageable_user_ids(user, user_ids):
+    """The subset of `user_ids` whose tasks `user` may manage (see can_manage_tasks),
+    checked with one query for all of them"""
+    user_ids = set(user_ids)
+    allowed = user_ids & {user.id}
+    if user_ids - allowed:
+        allowed.update(db.session.scalars(db.select(CareTeamMember.elderly_id).where(
+            CareTeamMember.member_id == user.id,
+            CareTeamMember.elderly_id.in_(user_ids - allowed)
+        )))
+    return allowed
+
+def bulk_task_items():
+    """The list of items in a bulk request body (a JSON array or {"tasks": [...]});
+    raises ValueError if malformed"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('tasks')
+    if not isinstance(data, list):
+        raise ValueError('Body must be a JSON array of tasks or {"tasks": [...]}')
+    if len(data) > app.config['TASK_BULK_MAX_ITEMS']:
+        raise ValueError(f"At most {app.config['TASK_BULK_MAX_ITEMS']} tasks per request")
+    return data
+
+def load_bulk_targets(user, items, results):
+    """Existing tasks referenced by `items` ({"id": ...}) that `user` may manage, keyed by id.
+
+    Items that are malformed, missing or not manageable get an error result.
+    """
+    ids = {item['id'] for item in items if isinstance(item, dict) and is_json_int(item.get('id'))}
+    tasks = {row.id: row for row in db.session.execute(
+        db.select(Task.id, Task.user_id, Task.due_time, Task.recurrence, Task.recurrence_until)
+        .where(Task.id.in_(ids))
+    )} if ids else {}
+    allowed = manageable_user_ids(user, {task.user_id for task in tasks.values()})
+
+    targets = {}
+    for index, item in enumerate(items):
+        task_id = item.get('id') if isinstance(item, dict) else None
+        if not is_json_int(task_id):
+            results[index] = {'index': index, 'status': 'error', 'error': 'Each item needs an integer id'}
+        elif task_id not in tasks:
+            results[index] = {'index': index, 'id': task_id, 'status': 'error', 'error': 'Task not found'}
+        elif tasks[task_id].user_id not in allowed:
+            results[index] = {'index': index, 'id': task_id, 'status': 'error', 'error': 'Unauthorized'}
+        else:
+            targets[index] = tasks[task_id]
+    return targets
+
+def bulk_response(results, *statuses):
+    """Per-item results in request order, with a count for each status and for errors"""
+    ordered = [results[index] for index in sorted(results)]
+    return jsonify({
+        **{status: sum(1 for result in ordered if result['status'] == status) for status in statuses},
+        'errors': sum(1 for result in ordered if result['status'] == 'error'),
+        'results': ordered
+    })
+
+@app.route('/api/tasks/bulk', methods=['POST'])
+@api_login_required
+def bulk_create_tasks():
+    """Create many tasks (e.g. a care plan) for the caller or their care team patients"""
+    current_user = get_current_user()
+    try:
+        items = bulk_task_items()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = {}
+    rows = []
+    for index, data in enumerate(items):
+        values, error = validate_task_fields(data)
+        user_id = data.get('user_id', current_user.id) if isinstance(data, dict) else None
+        if not error and not is_json_int(user_id):
+            error = 'user_id must be an integer'
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+            continue
+        rows.append((index, {'description': '', **values, 'user_id': user_id, 'is_completed': False,
+                             'created_at': datetime.utcnow()}))
+
+    allowed = manageable_user_ids(current_user, {values['user_id'] for _, values in rows})
+    for index, values in rows:
+        if values['user_id'] not in allowed:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Unauthorized'}
+    rows = [(index, values) for index, values in rows if index not in results]
+
+    if rows:
+        # sort_by_parameter_order returns the ids in the order of the rows; on SQLite that
+        # means one INSERT ... RETURNING per row, still in a single transaction
+        ids = db.session.scalars(db.insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                                 [values for _, values in rows]).all()
+        db.session.commit()
+        for (index, _), task_id in zip(rows, ids):
+            results[index] = {'index': index, 'id': task_id, 'status': 'created'}
+    return bulk_response(results, 'created')
+
+@app.route('/api/tasks/bulk', methods=['PUT'])
+@api_login_required
+def bulk_update_tasks():
+    """Update many tasks; each item is {"id": ..., <fields to change>}"""
+    current_user = get_current_user()
+    try:
+        items = bulk_task_items()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = {}
+    updates = []
+    schedules = {}
+    for index, task in load_bulk_targets(current_user, items, results).items():
+        values, error = validate_task_fields(items[index], task)
+        if error:
+            results[index] = {'index': index, 'id': task.id, 'status': 'error', 'error': error}
+            continue
+        updates.append({**values, 'id': task.id})
+        schedules[task.id] = ((task.due_time, task.recurrence, task.recurrence_until),
+                              (values.get('due_time', task.due_time), values['recurrence'], values['recurrence_until']))
+        results[index] = {'index': index, 'id': task.id, 'status': 'updated'}
+
+    if updates:
+        db.session.execute(db.update(Task), updates)  # executemany by primary key
+        reschedule_occurrences(schedules)
+        db.session.commit()
+    return bulk_response(results, 'updated')
+
+@app.route('/api/tasks/bulk/complete', methods=['POST'])
+@api_login_required
+def bulk_complete_tasks():
+    """Mark many tasks, or occurrences of recurring ones ({"id": ..., "occurrence": <due time>}),
+    done; pass "is_completed": false on an item to undo"""
+    current_user = get_current_user()
+    try:
+        items = bulk_task_items()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = {}
+    one_offs = {True: [], False: []}
+    occurrences = {True: [], False: []}
+    for index, task in load_bulk_targets(current_user, items, results).items():
+        item = items[index]
+        is_completed = item.get('is_completed', True)
+        if not isinstance(is_completed, bool):
+            results[index] = {'index': index, 'id': task.id, 'status': 'error', 'error': 'is_completed must be true or false'}
+            continue
+        if not item.get('occurrence'):
+            one_offs[is_completed].append(task.id)
+            results[index] = {'index': index, 'id': task.id, 'status': 'completed' if is_completed else 'reopened'}
+            continue
+        try:
+            due_time = datetime.fromisoformat(item['occurrence'])
+        except (TypeError, ValueError):
+            due_time = None
+        if not task.recurrence or due_time is None or next(expand_occurrences(
+                task.due_time, task.recurrence, task.recurrence_until, due_time, due_time), None) is None:
+            results[index] = {'index': index, 'id': task.id, 'status': 'error', 'error': 'No occurrence of this task at that time'}
+            continue
+        occurrences[is_completed].append((task.id, due_time))
+        results[index] = {'index': index, 'id': task.id, 'occurrence': due_time.isoformat(),
+                          'status': 'completed' if is_completed else 'reopened'}
+
+    for is_completed, task_ids in one_offs.items():
+        if task_ids:
+            Task.query.filter(Task.id.in_(task_ids)).update({'is_completed': is_completed}, synchronize_session=False)
+    if occurrences[True]:
+        stmt = sqlite_insert(TaskOccurrence.__table__)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['task_id', 'occurrence_time'],
+            set_={'is_completed': True, 'completed_at': stmt.excluded.completed_at}
+        ), [{'task_id': task_id, 'occurrence_time': due_time, 'is_completed': True, 'completed_at': datetime.utcnow()}
+            for task_id, due_time in occurrences[True]])
+    if occurrences[False]:
+        # Pending is the default, so reopening just drops the rows
+        db.session.execute(db.delete(TaskOccurrence).where(
+            db.tuple_(TaskOccurrence.task_id, TaskOccurrence.occurrence_time).in_(occurrences[False])
+        ))
+    db.session.commit()
+    return bulk_response(results, 'completed', 'reopened')
+
+@app.route('/api/tasks/bulk/delete', methods=['POST'])
+@api_login_required
+def bulk_delete_tasks():
+    """Delete many tasks; each item is {"id": ...}"""
+    current_user = get_current_user()
+    try:
+        items = bulk_task_items()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = {}
+    task_ids = set()
+    for index, task in load_bulk_targets(current_user, items, results).items():
+        task_ids.add(task.id)
+        results[index] = {'index': index, 'id': task.id, 'status': 'deleted'}
+
+    if task_ids:
+        TaskReminder.query.filter(TaskReminder.task_id.in_(task_ids)).delete(synchronize_session=False)
+        TaskOccurrence.query.filter(TaskOccurrence.task_id.in_(task_ids)).delete(synchronize_session=False)
+        Task.query.filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
+        db.session.commit()
+    return bulk_response(results, 'deleted')
+
+# Task reminders: a periodic scan over the due-soon window instead of a timer per task
+def claim_task_reminders(candidates, now):
+    """Record reminders not sent yet and queue their emails.
+
+    `candidates` maps (task_id, due_time) to (lead_minutes, row with name, email, title
+    and description). The insert ignores rows that already exist, so only reminders
+    this call claimed are emailed even when scans overlap.
+    """
+    if not candidates:
+        return 0
+    claim = sqlite_insert(TaskReminder.__table__).on_conflict_do_nothing()\
+        .returning(TaskReminder.task_id, TaskReminder.due_time)
+    claimed = db.session.execute(claim, [
+        {'task_id': task_id, 'lead_minutes': lead, 'due_time': due_time, 'sent_at': now}
+        for (task_id, due_time), (lead, _) in candidates.items()
+    ]).all()
+    db.session.commit()
+
+    messages = []
+    for task_id, due_time in claimed:
+        row = candidates[(task_id, due_time)][1]
+        occurrence = SimpleNamespace(title=row.title, description=row.description, due_time=due_time)
+        messages.append(task_reminder_email(row.name, row.email, occurrence))
+    queue_email_batches(messages)
+    return len(messages)
+
+def send_task_reminders(now=None):
+    """Queue reminder emails for pending tasks that entered a reminder window.
+
+    Each lead time owns the band between it and the next shorter one, so a task only gets
+    the closest reminder it is due for. One-off tasks are walked band by band on the
+    (is_completed, due_time) index in keyset batches, skipping those already reminded
+    via the dedupe table's unique index. Recurring series are expanded over the longest
+    lead time only. Returns the number of reminders queued.
+    """
+    now = now or datetime.utcnow()
+    lead_times = sorted(app.config['TASK_REMINDER_LEAD_TIMES'])
+    batch_size = app.config['TASK_REMINDER_BATCH_SIZE']
+    order = [(Task.due_time, False), (Task.id, False)]
+    columns = [Task.id, Task.title, Task.description, Task.due_time, User.name, User.email]
+
+    queued = 0
+    shorter = 0
+    for lead in lead_times:
+        reminded = db.select(TaskReminder.id).where(
+            TaskReminder.task_id == Task.id,
+            TaskReminder.lead_minutes == lead,
+            TaskReminder.due_time == Task.due_time
+        ).exists()
+        band = db.select(*columns).join(User, User.id == Task.user_id)\
+            .where(Task.is_completed == False,
+                   Task.due_time > now + timedelta(minutes=shorter),
+                   Task.due_time <= now + timedelta(minutes=lead),
+                   Task.recurrence.is_(None),
+                   ~reminded)\
+            .order_by(*keyset_order_by(order))
+        shorter = lead
+
+        after = None
+        while True:
+            query = band.where(keyset_filter(order, after)) if after else band
+            rows = db.session.execute(query.limit(batch_size)).all()
+            if not rows:
+                break
+            after = (rows[-1].due_time, rows[-1].id)
+            queued += claim_task_reminders({(row.id, row.due_time): (lead, row) for row in rows}, now)
+            if len(rows) < batch_size:
+                break
+
+    # Recurring series: expand each active one over the reminder horizon
+    horizon = now + timedelta(minutes=lead_times[-1])
+    series = db.select(*columns, Task.recurrence, Task.recurrence_until)\
+        .join(User, User.id == Task.user_id)\
+        .where(Task.recurrence.isnot(None),
+               Task.is_completed == False,
+               Task.due_time <= horizon,
+               db.or_(Task.recurrence_until.is_(None), Task.recurrence_until > now))\
+        .order_by(*keyset_order_by(order))
+    after = None
+    while True:
+        query = series.where(keyset_filter(order, after)) if after else series
+        rows = db.session.execute(query.limit(batch_size)).all()
+        if not rows:
+            break
+        after = (rows[-1].due_time, rows[-1].id)
+
+        task_ids = [row.id for row in rows]
+        reminded = set(db.session.execute(
+            db.select(TaskReminder.task_id, TaskReminder.due_time, TaskReminder.lead_minutes).where(
+                TaskReminder.task_id.in_(task_ids),
+                TaskReminder.due_time > now,
+                TaskReminder.due_time <= horizon
+            )
+        ).all())
+        completed = set(db.session.execute(
+            db.select(TaskOccurrence.task_id, TaskOccurrence.occurrence_time).where(
+                TaskOccurrence.task_id.in_(task_ids),
+                TaskOccurrence.occurrence_time > now,
+                TaskOccurrence.occurrence_time <= horizon
+            )
+        ).all())
+
+        candidates = {}
+        for row in rows:
+            for due_time in expand_occurrences(row.due_time, row.recurrence, row.recurrence_until,
+                                               now + timedelta(microseconds=1), horizon):
+                remaining = (due_time - now).total_seconds() / 60
+                lead = next(lead for lead in lead_times if remaining <= lead)
+                if (row.id, due_time) not in completed and (row.id, due_time, lead) not in reminded:
+                    candidates[(row.id, due_time)] = (lead, row)
+        queued += claim_task_reminders(candidates, now)
+        if len(rows) < batch_size:
+            break
+    return queued
+
+@celery.task(name='caremate.send_task_reminders')
+def send_task_reminders_task():
+    """Celery beat task: remind users of tasks entering a reminder window"""
+    with app.app_context():
+        return send_task_reminders()
+
+@app.cli.command('send-task-reminders')
+def send_task_reminders_command():
+    """Run one task reminder scan immediately"""
+    count = send_task_reminders()
+    click.echo(f'Queued {count} task reminders')
+
+# Emergency contacts
+class ContactSnapshot:
+    """Detached copy of an emergency contact and the contact user's details"""
+    __slots__ = ('id', 'contact_id', 'relationship', 'name', 'email', 'phone')
+
+    def __init__(self, row):
+        for field in self.__slots__:
+            setattr(self, field, getattr(row, field))
+
+emergency_contact_cache = TTLCache(
+    maxsize=app.config['EMERGENCY_CONTACT_CACHE_SIZE'],
+    ttl=app.config['EMERGENCY_CONTACT_CACHE_TTL'],
+    generations=cache_generations('emergency_contacts')
+)
+
+def get_emergency_contact_set(elderly_id):
+    """An elderly user's emergency contacts, from cache or one joined query"""
+    def load():
+        rows = db.session.execute(
+            db.select(
+                EmergencyContact.id, EmergencyContact.contact_id, EmergencyContact.relationship,
+                User.name, User.email, User.phone
+            ).join(User, User.id == EmergencyContact.contact_id)
+            .where(EmergencyContact.elderly_id == elderly_id)
+            .order_by(EmergencyContact.id)
+        )
+        return tuple(ContactSnapshot(row) for row in rows)
+    return emergency_contact_cache.get_or_load(elderly_id, load)
+
+class OpenAlertIndex:
+    """Unresolved emergency alerts kept in memory, by id and by involved user (the
+    elderly user and every notified contact), so the active alerts view never
+    touches alert history. Changes made in this process apply immediately; the
+    whole index is reloaded from the database every `ttl` seconds to pick up
+    alerts raised or changed elsewhere, or as soon as another process reports a
+    change when `generations` is shared.
+    """
+
+    def __init__(self, ttl=30, generations=None):
+        self.ttl = ttl
+        self.generations = generations
+        self._alerts = {}
+        self._by_user = {}
+        self._loaded_at = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _changed(self):
+        """Tell other processes to reload; stay current here if nothing else changed meanwhile"""
+        if self.generations:
+            generation = self.generations.bump()
+            with self._lock:
+                if self._generation is not None and generation == self._generation[0] + 1:
+                    self._generation = (generation, self._generation[1])
+
+    def _unlink(self, alert_id):
+        alert = self._alerts.pop(alert_id, None)
+        if alert:
+            for user_id in [alert['elderly_id']] + alert['contact_ids']:
+                self._by_user.get(user_id, set()).discard(alert_id)
+
+    def _put(self, alert):
+        with self._lock:
+            self._unlink(alert['id'])
+            self._alerts[alert['id']] = alert
+            for user_id in [alert['elderly_id']] + alert['contact_ids']:
+                self._by_user.setdefault(user_id, set()).add(alert['id'])
+
+    def put(self, alert):
+        self._put(alert)
+        self._changed()
+
+    def update(self, alert_id, **fields):
+        with self._lock:
+            if alert_id in self._alerts:
+                self._alerts[alert_id] = {**self._alerts[alert_id], **fields}
+        self._changed()
+
+    def remove(self, alert_id):
+        with self._lock:
+            self._unlink(alert_id)
+        self._changed()
+
+    def for_user(self, user_id):
+        """Open alerts involving `user_id`, newest first"""
+        stale = self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+        if self.generations and not stale:
+            try:
+                stale = self.generations.current() != self._generation
+            except redis.RedisError as e:
+                print(f"Open alert generation lookup failed: {str(e)}")
+        if stale:
+            self.reload()
+        with self._lock:
+            alerts = [self._alerts[alert_id] for alert_id in self._by_user.get(user_id, ())]
+        return sorted(alerts, key=lambda alert: alert['id'], reverse=True)
+
+    def reload(self):
+        generation = None
+        if self.generations:
+            try:
+                generation = self.generations.current()
+            except redis.RedisError as e:
+                print(f"Open alert generation lookup failed: {str(e)}")
+        alerts = db.session.scalars(
+            db.select(EmergencyAlert)
+            .where(EmergencyAlert.status.in_(['active', 'acknowledged']))
+            .options(db.joinedload(EmergencyAlert.elderly), db.selectinload(EmergencyAlert.deliveries))
+        ).unique().all()
+        summaries = [open_alert_summary(alert, alert.elderly.name) for alert in alerts]
+        with self._lock:
+            self._alerts = {}
+            self._by_user = {}
+            self._loaded_at = time.monotonic()
+            self._generation = generation
+        for summary in summaries:
+            self._put(summary)
+
+    def clear(self):
+        with self._lock:
+            self._alerts = {}
+            self._by_user = {}
+            self._loaded_at = None
+            self._generation = None
+
+open_alert_index = OpenAlertIndex(ttl=app.config['OPEN_ALERT_INDEX_TTL'],
+                                  generations=cache_generations('open_alerts'))
+
+def open_alert_summary(alert, elderly_name):
+    return {
+        'id': alert.id,
+        'elderly_id': alert.elderly_id,
+        'elderly_name': elderly_name,
+        'status': alert.status,
+        'message': alert.message,
+        'location': alert.location,
+        'escalation_level': alert.escalation_level,
+        'created_at': alert.created_at.isoformat(),
+        'acknowledged_at': alert.acknowledged_at.isoformat() if alert.acknowledged_at else None,
+        'acknowledged_by': alert.acknowledged_by,
+        'contact_ids': [delivery.contact_id for delivery in alert.deliveries]
+    }
+
+# Emergency alert dispatch: socket push from the web process, email fan-out on the
+# dedicated emergency queue, escalation until a contact acknowledges
+def emergency_alert_payload(alert, elderly):
+    return {
+        'alert_id': alert.id,
+        'elderly_id': elderly.id,
+        'elderly_name': elderly.name,
+        'elderly_phone': elderly.phone,
+        'message': alert.message,
+        'location': alert.location or 'Location not provided',
+        'timestamp': alert.created_at.isoformat(),
+        'escalation_level': alert.escalation_level
+    }
+
+def push_emergency_alert(payload, contact_ids):
+    """Push an alert payload to the contacts connected over Socket.IO, returning the ids reached.
+
+    Pushes from Celery workers reach clients only when Socket.IO is configured with a
+    message queue (SOCKETIO_MESSAGE_QUEUE), and see who is online only with the Redis
+    presence backend.
+    """
+    reached = presence.online(contact_ids)
+    if reached:
+        socketio.emit('emergency_alert', payload, to=[user_room(contact_id) for contact_id in reached])
+    return reached
+
+def send_emergency_emails(alert_id):
+    """Email every contact of an alert whose email is not sent yet, concurrently.
+
+    Returns the number of deliveries that failed.
+    """
+    alert = db.session.get(EmergencyAlert, alert_id)
+    if alert is None or alert.status == 'resolved':
+        return 0
+    rows = db.session.execute(
+        db.select(EmergencyAlertDelivery, User.email)
+        .join(User, User.id == EmergencyAlertDelivery.contact_id)
+        .where(EmergencyAlertDelivery.alert_id == alert_id, EmergencyAlertDelivery.email_status != 'sent')
+    ).all()
+    if not rows:
+        return 0
+
+    subject, body = emergency_alert_email(alert, alert.elderly.name, alert.escalation_level)
+
+    def send(email):
+        try:
+            with app.app_context(), mail_pool.connection() as connection:
+                connection.send(Message(subject, sender='alerts@caremate.com', recipients=[email], body=body))
+            mail_metrics.add(sent=1)
+            return None
+        except Exception as e:
+            mail_metrics.add(failed=1)
+            return str(e)
+
+    workers = min(app.config['EMERGENCY_DISPATCH_CONCURRENCY'], len(rows))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        errors = list(pool.map(send, [row.email for row in rows]))
+
+    now = datetime.utcnow()
+    for row, error in zip(rows, errors):
+        delivery = row.EmergencyAlertDelivery
+        delivery.attempts += 1
+        delivery.email_status = 'failed' if error else 'sent'
+        delivery.last_error = error
+        if not error:
+            delivery.sent_at = now
+    db.session.commit()
+    return sum(1 for error in errors if error)
+
+@celery.task(bind=True, name='caremate.dispatch_emergency_alert')
+def dispatch_emergency_alert(self, alert_id):
+    """Celery task fanning an emergency alert out to all contacts, retrying failures with backoff"""
+    with app.app_context():
+        failed = send_emergency_emails(alert_id)
+    if failed and self.request.retries < app.config['EMERGENCY_DISPATCH_MAX_RETRIES']:
+        raise self.retry(countdown=2 ** self.request.retries)
+    return f'{failed} deliveries failed'
+
+@celery.task(name='caremate.escalate_emergency_alert')
+def escalate_emergency_alert(alert_id):
+    """Celery task re-notifying contacts of an alert nobody has acknowledged yet"""
+    with app.app_context():
+        alert = db.session.get(EmergencyAlert, alert_id)
+        if alert is None or alert.status != 'active':
+            return 'No escalation needed'
+        if alert.escalation_level >= app.config['EMERGENCY_MAX_ESCALATIONS']:
+            return 'Escalations exhausted'
+
+        alert.escalation_level += 1
+        level = alert.escalation_level
+        EmergencyAlertDelivery.query.filter(
+            EmergencyAlertDelivery.alert_id == alert_id,
+            EmergencyAlertDelivery.acknowledged_at.is_(None)
+        ).update({EmergencyAlertDelivery.email_status: 'pending'}, synchronize_session=False)
+        db.session.commit()
+        push_emergency_alert(emergency_alert_payload(alert, alert.elderly),
+                             [delivery.contact_id for delivery in alert.deliveries])
+
+    dispatch_emergency_alert.delay(alert_id)
+    escalate_emergency_alert.apply_async(args=[alert_id], countdown=app.config['EMERGENCY_ESCALATION_TIMEOUT'])
+    return f'Escalated to level {level}'
+
+def acknowledge_emergency_alert(alert_id, contact_id):
+    """Record a contact's acknowledgement; the first one also acknowledges the alert.
+
+    Returns the alert, or None if the contact was not notified of it.
+    """
+    now = datetime.utcnow()
+    delivery = EmergencyAlertDelivery.query.filter_by(alert_id=alert_id, contact_id=contact_id).first()
+    if delivery is None:
+        return None
+    if delivery.acknowledged_at is None:
+        delivery.acknowledged_at = now
+    # Conditional update so concurrent acknowledgements agree on who was first
+    EmergencyAlert.query.filter(
+        EmergencyAlert.id == alert_id,
+        EmergencyAlert.status == 'active'
+    ).update({
+        EmergencyAlert.status: 'acknowledged',
+        EmergencyAlert.acknowledged_at: now,
+        EmergencyAlert.acknowledged_by: contact_id
+    }, synchronize_session=False)
+    db.session.commit()
+    alert = db.session.get(EmergencyAlert, alert_id, populate_existing=True)
+    open_alert_index.update(alert_id, status=alert.status, acknowledged_by=alert.acknowledged_by,
+                            acknowledged_at=alert.acknowledged_at.isoformat() if alert.acknowledged_at else None)
+    return alert
+
+@socketio.on('emergency_alert_ack')
+def handle_emergency_alert_ack(data):
+    """Handle a contact acknowledging an emergency alert pushed to them"""
+    try:
+        current_user = get_current_user()
+        if not current_user:
+            return
+        alert = acknowledge_emergency_alert(data['alert_id'], current_user.id)
+        if alert is None:
+            return
+        socketio.emit('emergency_alert_acknowledged', {
+            'alert_id': alert.id,
+            'acknowledged_by': current_user.id,
+            'acknowledged_by_name': current_user.name
+        }, to=user_room(alert.elderly_id))
+    except Exception as e:
+        print(f"Emergency acknowledgement error: {str(e)}")
+
+def serialize_emergency_alert(alert):
+    return {
+        'id': alert.id,
+        'status': alert.status,
+        'message': alert.message,
+        'location': alert.location,
+        'escalation_level': alert.escalation_level,
+        'created_at': alert.created_at.isoformat(),
+        'acknowledged_at': alert.acknowledged_at.isoformat() if alert.acknowledged_at else None,
+        'acknowledged_by': alert.acknowledged_by,
+        'resolved_at': alert.resolved_at.isoformat() if alert.resolved_at else None,
+        'resolved_by': alert.resolved_by,
+        'deliveries': [{
+            'contact_id': delivery.contact_id,
+            'email_status': delivery.email_status,
+            'push_status': delivery.push_status,
+            'attempts': delivery.attempts,
+            'acknowledged_at': delivery.acknowledged_at.isoformat() if delivery.acknowledged_at else None
+        } for delivery in alert.deliveries]
+    }
 
 # Emergency Alert System Routes
 @app.route('/api/emergency/contacts', methods=['GET'])
 @api_login_required
 def get_emergency_contacts():
     current_user = get_current_user()
-    contacts = EmergencyContact.query.filter_by(elderly_id=current_user.id).all()
+    contacts = get_emergency_contact_set(current_user.id)
     
     return jsonify([{
         'id': contact.id,
-        'contact_user': User.query.get(contact.contact_id).name,
-        'phone': User.query.get(contact.contact_id).phone,
+        'contact_user': contact.name,
+        'phone': contact.phone,
         'relationship': contact.relationship
     } for contact in contacts])
 
@@ -809,52 +3208,192 @@ def add_emergency_contact():
 @api_login_required
 def create_emergency_alert():
     current_user = get_current_user()
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     
     # Get all emergency contacts
-    contacts = EmergencyContact.query.filter_by(elderly_id=current_user.id).all()
+    contacts = list({contact.contact_id: contact for contact in get_emergency_contact_set(current_user.id)}.values())
     
     if not contacts:
         return jsonify({'error': 'No emergency contacts found'}), 400
     
-    # In a real application, you would:
-    # 1. Send SMS notifications
-    # 2. Make automated phone calls
-    # 3. Send push notifications
-    # 4. Contact emergency services if configured
-    
-    # For now, we'll simulate the alert
+    alert = EmergencyAlert(
+        elderly_id=current_user.id,
+        message=data.get('message', 'Emergency assistance needed!'),
+        location=data.get('location')
+    )
+    online = presence.online([contact.contact_id for contact in contacts])
+    alert.deliveries = [EmergencyAlertDelivery(
+        contact_id=contact.contact_id,
+        push_status='delivered' if contact.contact_id in online else 'offline'
+    ) for contact in contacts]
+    db.session.add(alert)
+    db.session.flush()
+    # Render before committing so nothing is reloaded on the way out
+    payload = emergency_alert_payload(alert, current_user)
+    summary = open_alert_summary(alert, current_user.name)
     alert_message = {
+        **serialize_emergency_alert(alert),
         'type': 'EMERGENCY_ALERT',
         'elderly_name': current_user.name,
         'elderly_phone': current_user.phone,
-        'message': data.get('message', 'Emergency assistance needed!'),
-        'location': data.get('location', 'Location not provided'),
-        'timestamp': datetime.utcnow().isoformat(),
+        'message': alert.message,
+        'location': alert.location or 'Location not provided',
+        'timestamp': alert.created_at.isoformat(),
         'notified_contacts': [{
-            'name': User.query.get(contact.contact_id).name,
-            'phone': User.query.get(contact.contact_id).phone
+            'name': contact.name,
+            'phone': contact.phone
         } for contact in contacts]
     }
+    db.session.commit()
+    open_alert_index.put(summary)
 
-    send_emergency_alert_email(
-        emergency_contacts=contacts,
-        alert_message=alert_message['message'],
-        elderly_user=current_user
-    )
+    # Online contacts hear about it immediately; email goes out on the emergency queue
+    push_emergency_alert(payload, [contact.contact_id for contact in contacts])
+    dispatch_emergency_alert.delay(payload['alert_id'])
+    escalate_emergency_alert.apply_async(args=[payload['alert_id']],
+                                         countdown=app.config['EMERGENCY_ESCALATION_TIMEOUT'])
     
     return jsonify({
         'message': 'Emergency alert sent successfully',
         'alert': alert_message
     })
 
+EMERGENCY_ALERT_SCHEMA = RowSchema(
+    ('id', EmergencyAlert.id),
+    ('status', EmergencyAlert.status),
+    ('message', EmergencyAlert.message),
+    ('location', EmergencyAlert.location),
+    ('escalation_level', EmergencyAlert.escalation_level),
+    ('created_at', EmergencyAlert.created_at),
+    ('acknowledged_at', EmergencyAlert.acknowledged_at),
+    ('acknowledged_by', EmergencyAlert.acknowledged_by),
+    ('resolved_at', EmergencyAlert.resolved_at)
+)
+RECEIVED_ALERT_SCHEMA = RowSchema(
+    ('id', EmergencyAlert.id),
+    ('status', EmergencyAlert.status),
+    ('message', EmergencyAlert.message),
+    ('location', EmergencyAlert.location),
+    ('escalation_level', EmergencyAlert.escalation_level),
+    ('created_at', EmergencyAlert.created_at),
+    ('acknowledged_at', EmergencyAlert.acknowledged_at),
+    ('acknowledged_by', EmergencyAlert.acknowledged_by),
+    ('resolved_at', EmergencyAlert.resolved_at),
+    ('elderly_id', EmergencyAlert.elderly_id),
+    ('elderly_name', User.name),
+    ('my_acknowledged_at', EmergencyAlertDelivery.acknowledged_at)
+)
+
+def emergency_alert_page(query, order, schema):
+    """Keyset page of an alert history query as a bare array with pagination headers"""
+    per_page, cursor, include_total = pagination_args()
+    after = decode_keyset_cursor(cursor, order) if cursor else None
+    if cursor and after is None:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    rows, next_cursor, total = keyset_page(query, order, per_page, after, include_total)
+    return json_response(schema.dicts(rows), headers=pagination_headers(next_cursor, total))
+
+@app.route('/api/emergency/alerts', methods=['GET'])
+@api_login_required
+def get_emergency_alerts():
+    """Alerts raised by the current user, newest first"""
+    current_user = get_current_user()
+    query = EMERGENCY_ALERT_SCHEMA.select().where(EmergencyAlert.elderly_id == current_user.id)
+    if request.args.get('status'):
+        query = query.where(EmergencyAlert.status == request.args['status'])
+    order = [(EmergencyAlert.created_at, True), (EmergencyAlert.id, True)]
+    return emergency_alert_page(query, order, EMERGENCY_ALERT_SCHEMA)
+
+@app.route('/api/emergency/alerts/received', methods=['GET'])
+@api_login_required
+def get_received_emergency_alerts():
+    """Alerts the current user was notified of as an emergency contact, newest first"""
+    current_user = get_current_user()
+    query = RECEIVED_ALERT_SCHEMA.select()\
+        .select_from(EmergencyAlertDelivery)\
+        .join(EmergencyAlert, EmergencyAlert.id == EmergencyAlertDelivery.alert_id)\
+        .join(User, User.id == EmergencyAlert.elderly_id)\
+        .where(EmergencyAlertDelivery.contact_id == current_user.id)
+    # Alert ids grow with creation time, so this walks the (contact_id, alert_id) index
+    order = [(EmergencyAlertDelivery.alert_id, True)]
+    return emergency_alert_page(query, order, RECEIVED_ALERT_SCHEMA)
+
+@app.route('/api/emergency/alerts/active', methods=['GET'])
+@api_login_required
+def get_active_emergency_alerts():
+    """Unresolved alerts the current user raised or was notified of, served from memory"""
+    current_user = get_current_user()
+    alerts = open_alert_index.for_user(current_user.id)
+    if request.args.get('unacknowledged', 'false').lower() == 'true':
+        alerts = [alert for alert in alerts if alert['status'] == 'active']
+    return jsonify(alerts)
+
+def get_visible_emergency_alert(alert_id, user_id):
+    """The alert with its deliveries if `user_id` raised it or was notified of it, else None"""
+    alert = db.session.scalars(
+        db.select(EmergencyAlert).where(EmergencyAlert.id == alert_id)
+        .options(db.selectinload(EmergencyAlert.deliveries))
+    ).first()
+    if alert is None:
+        return None
+    if alert.elderly_id != user_id and user_id not in {d.contact_id for d in alert.deliveries}:
+        return None
+    return alert
+
+@app.route('/api/emergency/alert/<int:alert_id>', methods=['GET'])
+@api_login_required
+def get_emergency_alert(alert_id):
+    current_user = get_current_user()
+    alert = get_visible_emergency_alert(alert_id, current_user.id)
+    if alert is None:
+        return jsonify({'error': 'Alert not found'}), 404
+    return jsonify(serialize_emergency_alert(alert))
+
+@app.route('/api/emergency/alert/<int:alert_id>/acknowledge', methods=['POST'])
+@api_login_required
+def acknowledge_alert(alert_id):
+    """A notified contact acknowledges an alert, stopping further escalation"""
+    current_user = get_current_user()
+    alert = acknowledge_emergency_alert(alert_id, current_user.id)
+    if alert is None:
+        return jsonify({'error': 'Alert not found'}), 404
+    socketio.emit('emergency_alert_acknowledged', {
+        'alert_id': alert.id,
+        'acknowledged_by': current_user.id,
+        'acknowledged_by_name': current_user.name
+    }, to=user_room(alert.elderly_id))
+    return jsonify(serialize_emergency_alert(alert))
+
+@app.route('/api/emergency/alert/<int:alert_id>/resolve', methods=['PUT'])
+@api_login_required
+def resolve_emergency_alert(alert_id):
+    """Close an alert (the patient or a notified contact); stops escalation"""
+    current_user = get_current_user()
+    alert = get_visible_emergency_alert(alert_id, current_user.id)
+    if alert is None:
+        return jsonify({'error': 'Alert not found'}), 404
+    if alert.status == 'resolved':
+        return jsonify(serialize_emergency_alert(alert))
+
+    alert.status = 'resolved'
+    alert.resolved_at = datetime.utcnow()
+    alert.resolved_by = current_user.id
+    result = serialize_emergency_alert(alert)
+    involved = [alert.elderly_id] + [delivery.contact_id for delivery in alert.deliveries]
+    db.session.commit()
+    open_alert_index.remove(alert_id)
+
+    socketio.emit('emergency_alert_resolved', {'alert_id': alert_id, 'resolved_by': current_user.id},
+                  to=[user_room(user_id) for user_id in involved])
+    return jsonify(result)
+
 @app.route('/api/emergency/test', methods=['POST'])
 @api_login_required
 def test_emergency_system():
     """Test the emergency alert system without notifying contacts"""
     current_user = get_current_user()
     
-    contacts = EmergencyContact.query.filter_by(elderly_id=current_user.id).all()
+    contacts = get_emergency_contact_set(current_user.id)
     if not contacts:
         return jsonify({'error': 'No emergency contacts found'}), 400
     
@@ -864,48 +3403,154 @@ def test_emergency_system():
         'system_status': 'operational'
     })
 
+def refresh_leaderboard():
+    """Rank verified caregivers by Bayesian-weighted rating and materialize the result.
+
+    score = (C * m + rating_sum) / (C + rating_count), where m is the mean rating across
+    all verified caregivers and C is LEADERBOARD_PRIOR_WEIGHT, so caregivers with a few
+    perfect reviews do not outrank ones with many excellent reviews.
+    """
+    prior_weight = app.config['LEADERBOARD_PRIOR_WEIGHT']
+    size = app.config['LEADERBOARD_SIZE']
+
+    rows = db.session.query(Caregiver, User.name)\
+        .join(User, User.id == Caregiver.user_id)\
+        .filter(Caregiver.verification_status == True)\
+        .all()
+
+    total_sum = sum(row.Caregiver.rating_sum for row in rows)
+    total_count = sum(row.Caregiver.rating_count for row in rows)
+    global_mean = total_sum / total_count if total_count else 0
+
+    ranked = []
+    for row in rows:
+        caregiver = row.Caregiver
+        score = (prior_weight * global_mean + caregiver.rating_sum) / (prior_weight + caregiver.rating_count) \
+            if prior_weight + caregiver.rating_count else 0
+        ranked.append((score, row))
+    # Review count and experience break ties between equal scores
+    ranked.sort(key=lambda item: (
+        -item[0],
+        -item[1].Caregiver.rating_count,
+        -(item[1].Caregiver.experience_years or 0),
+        item[1].Caregiver.id
+    ))
+
+    now = datetime.utcnow()
+    entries = []
+    bucket_sizes = {}
+    for score, row in ranked:
+        caregiver = row.Caregiver
+        for bucket in [''] + parse_specializations(caregiver.specializations):
+            rank = bucket_sizes.get(bucket, 0) + 1
+            if rank > size:
+                continue
+            bucket_sizes[bucket] = rank
+            entries.append({
+                'bucket': bucket,
+                'rank': rank,
+                'caregiver_id': caregiver.id,
+                'score': score,
+                'average_rating': caregiver.average_rating,
+                'total_reviews': caregiver.rating_count,
+                'name': row.name,
+                'hourly_rate': caregiver.hourly_rate,
+                'experience_years': caregiver.experience_years,
+                'specializations': caregiver.specializations,
+                'refreshed_at': now
+            })
+
+    # Swap the snapshot in a single transaction so readers never see a partial ranking
+    LeaderboardEntry.query.delete()
+    if entries:
+        db.session.execute(db.insert(LeaderboardEntry), entries)
+    db.session.commit()
+    return len(entries)
+
+@celery.task(name='caremate.refresh_leaderboard')
+def refresh_leaderboard_task():
+    """Celery task to rebuild the caregiver leaderboard"""
+    with app.app_context():
+        return refresh_leaderboard()
+
+_leaderboard_refresh_queued_at = 0
+
+def schedule_leaderboard_refresh():
+    """Queue a leaderboard refresh, coalescing bursts of review writes into one rebuild"""
+    global _leaderboard_refresh_queued_at
+    debounce = app.config['LEADERBOARD_REFRESH_DEBOUNCE']
+    now = time.monotonic()
+    if now - _leaderboard_refresh_queued_at < debounce:
+        return
+    _leaderboard_refresh_queued_at = now
+    refresh_leaderboard_task.apply_async(countdown=debounce)
+
+@app.cli.command('refresh-leaderboard')
+def refresh_leaderboard_command():
+    """Rebuild the caregiver leaderboard immediately"""
+    count = refresh_leaderboard()
+    click.echo(f'Materialized {count} leaderboard entries')
+
 @app.route('/api/caregivers/top', methods=['GET'])
 @api_login_required
 def get_top_caregivers():
-    """Get top-rated and verified caregivers"""
-    top_caregivers = db.session.query(Caregiver, User)\
-        .join(User)\
-        .filter(Caregiver.verification_status == True)\
-        .order_by(Caregiver.experience_years.desc())\
-        .limit(5)\
-        .all()
-    
+    """Get top-rated and verified caregivers from the materialized leaderboard"""
+    limit = min(max(request.args.get('limit', 5, type=int), 1), app.config['LEADERBOARD_SIZE'])
+    specialization = request.args.get('specialization')
+    bucket = parse_specializations(specialization)[0] if specialization else ''
+
+    # Built by upgrade_database() and kept fresh by the beat task; empty until then
+    entries = LeaderboardEntry.query.filter_by(bucket=bucket).order_by(LeaderboardEntry.rank)\
+        .limit(limit).all()
+
     return jsonify([{
-        'id': caregiver.Caregiver.id,
-        'name': caregiver.User.name,
-        'hourly_rate': caregiver.Caregiver.hourly_rate,
-        'experience_years': caregiver.Caregiver.experience_years,
-        'specializations': caregiver.Caregiver.specializations,
-        'average_rating': caregiver.Caregiver.average_rating
-    } for caregiver in top_caregivers])
+        'id': entry.caregiver_id,
+        'rank': entry.rank,
+        'name': entry.name,
+        'hourly_rate': entry.hourly_rate,
+        'experience_years': entry.experience_years,
+        'specializations': entry.specializations,
+        'average_rating': entry.average_rating,
+        'total_reviews': entry.total_reviews,
+        'score': entry.score
+    } for entry in entries])
+
+REVIEW_SCHEMA = RowSchema(
+    ('id', Review.id),
+    ('rating', Review.rating),
+    ('comment', Review.comment),
+    ('reviewer_name', User.name),
+    ('created_at', Review.created_at)
+)
 
 @app.route('/api/caregivers/<int:caregiver_id>/reviews', methods=['GET'])
 @api_login_required
 def get_reviews(caregiver_id):
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page, cursor, include_total = pagination_args(default_per_page=10)
     
-    reviews = Review.query.filter_by(caregiver_id=caregiver_id)\
-        .order_by(Review.created_at.desc())\
-        .paginate(page=page, per_page=per_page)
+    query = REVIEW_SCHEMA.select()\
+        .join(User, User.id == Review.reviewer_id)\
+        .where(Review.caregiver_id == caregiver_id)
+    order = [(Review.created_at, True), (Review.id, True)]
+    after = decode_keyset_cursor(cursor, order) if cursor else None
+    if cursor and after is None:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    # Page numbers still work, but deep paging should follow next_cursor
+    offset = 0 if cursor else (page - 1) * per_page
+    rows, next_cursor, total = keyset_page(query, order, per_page, after, include_total, offset)
     
-    return jsonify({
-        'total_reviews': reviews.total,
-        'current_page': reviews.page,
-        'total_pages': reviews.pages,
-        'reviews': [{
-            'id': review.id,
-            'rating': review.rating,
-            'comment': review.comment,
-            'reviewer_name': User.query.get(review.reviewer_id).name,
-            'created_at': review.created_at.isoformat()
-        } for review in reviews.items]
-    })
+    response = {
+        'reviews': REVIEW_SCHEMA.dicts(rows),
+        'per_page': per_page,
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor
+    }
+    if not cursor:
+        response['page'] = page
+    if include_total:
+        response['total'] = total
+    return json_response(response)
 
 @app.route('/api/caregivers/<int:caregiver_id>/contact', methods=['POST'])
 @api_login_required
@@ -927,79 +3572,500 @@ def contact_caregiver(caregiver_id):
         }
     })
 
+# Health metric rollups
+ROLLUP_RESOLUTIONS = ['hour', 'day']
+ROLLUP_FIELDS = ['value', 'systolic', 'diastolic']
+
+def rollup_bucket(timestamp, resolution):
+    """Start of the hour or day containing `timestamp`"""
+    if resolution == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def accumulate_rollups(readings, buckets=None):
+    """Fold readings into per-(user, type, resolution, bucket) aggregates.
+
+    `readings` are HealthMetric rows (or rows with the same attributes); blood pressure
+    aggregates systolic/diastolic, everything else aggregates value.
+    """
+    buckets = {} if buckets is None else buckets
+    for reading in readings:
+        is_bp = reading.metric_type == 'blood_pressure'
+        fields = {'systolic': reading.systolic, 'diastolic': reading.diastolic} if is_bp \
+            else {'value': reading.value}
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (reading.user_id, reading.metric_type, resolution,
+                   rollup_bucket(reading.timestamp, resolution))
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {
+                    'user_id': key[0], 'metric_type': key[1], 'resolution': key[2],
+                    'bucket_start': key[3], 'unit': reading.unit, 'reading_count': 0,
+                    **{f'{field}_{stat}': None for field in ROLLUP_FIELDS for stat in ('sum', 'min', 'max')}
+                }
+            bucket['reading_count'] += 1
+            bucket['unit'] = reading.unit
+            for field, value in fields.items():
+                if value is None:
+                    continue
+                bucket[f'{field}_sum'] = (bucket[f'{field}_sum'] or 0) + value
+                bucket[f'{field}_min'] = value if bucket[f'{field}_min'] is None else min(bucket[f'{field}_min'], value)
+                bucket[f'{field}_max'] = value if bucket[f'{field}_max'] is None else max(bucket[f'{field}_max'], value)
+    return buckets
+
+def apply_rollups(buckets):
+    """Merge accumulated aggregates into HealthMetricRollup with one upsert statement"""
+    if not buckets:
+        return
+    rollup = HealthMetricRollup.__table__
+    stmt = sqlite_insert(rollup)
+    excluded = stmt.excluded
+
+    def merged(field, stat):
+        current, incoming = rollup.c[f'{field}_{stat}'], excluded[f'{field}_{stat}']
+        if stat == 'sum':
+            combined = current + incoming
+        else:
+            combined = getattr(db.func, stat)(current, incoming)  # SQLite scalar min()/max()
+        return db.func.coalesce(combined, current, incoming)
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'resolution', 'metric_type', 'bucket_start'],
+        set_={
+            'unit': excluded.unit,
+            'reading_count': rollup.c.reading_count + excluded.reading_count,
+            **{f'{field}_{stat}': merged(field, stat)
+               for field in ROLLUP_FIELDS for stat in ('sum', 'min', 'max')}
+        }
+    )
+    db.session.execute(stmt, list(buckets.values()))
+
+def rebuild_health_rollups(chunk_size=10000):
+    """Recompute every rollup from the raw HealthMetric table in streamed chunks"""
+    HealthMetricRollup.query.delete()
+    buckets = {}
+    readings = db.session.execute(db.select(
+        HealthMetric.user_id, HealthMetric.metric_type, HealthMetric.value, HealthMetric.unit,
+        HealthMetric.systolic, HealthMetric.diastolic, HealthMetric.timestamp
+    ).execution_options(yield_per=chunk_size))
+    for readings_chunk in readings.partitions():
+        accumulate_rollups(readings_chunk, buckets)
+    apply_rollups(buckets)
+    db.session.commit()
+    return len(buckets)
+
+def choose_resolution(days):
+    """Pick raw readings or a rollup resolution for a window of `days` (0 = all history)"""
+    if days and days <= app.config['HEALTH_RAW_MAX_DAYS']:
+        return 'raw'
+    if days and days <= app.config['HEALTH_HOURLY_MAX_DAYS']:
+        return 'hour'
+    return 'day'
+
+def ceil_bucket(timestamp, resolution):
+    start = rollup_bucket(timestamp, resolution)
+    if start == timestamp:
+        return start
+    return start + (timedelta(hours=1) if resolution == 'hour' else timedelta(days=1))
+
+def summarize_metric_window(user_id, since_date):
+    """Exact per-type statistics since `since_date` using the coarsest data available.
+
+    Whole days come from daily rollups, the leading partial day from hourly rollups and
+    the leading partial hour from raw readings, so at most three grouped queries run
+    regardless of window size.
+    """
+    since_hour = ceil_bucket(since_date, 'hour')
+    since_day = max(ceil_bucket(since_date, 'day'), since_hour)
+
+    aggregates = [db.func.sum(HealthMetricRollup.reading_count)]
+    for field in ROLLUP_FIELDS:
+        aggregates += [
+            db.func.sum(getattr(HealthMetricRollup, f'{field}_sum')),
+            db.func.min(getattr(HealthMetricRollup, f'{field}_min')),
+            db.func.max(getattr(HealthMetricRollup, f'{field}_max')),
+        ]
+    tiers = [
+        db.session.query(HealthMetricRollup.metric_type, db.func.max(HealthMetricRollup.unit), *aggregates)
+        .filter(HealthMetricRollup.user_id == user_id,
+                HealthMetricRollup.resolution == resolution,
+                HealthMetricRollup.bucket_start >= start,
+                *([HealthMetricRollup.bucket_start < end] if end else []))
+        .group_by(HealthMetricRollup.metric_type)
+        for resolution, start, end in [('day', since_day, None), ('hour', since_hour, since_day)]
+    ]
+    raw_aggregates = [db.func.count(HealthMetric.id)]
+    for field in ROLLUP_FIELDS:
+        raw_column = getattr(HealthMetric, field)
+        if field == 'value':
+            raw_column = db.case((HealthMetric.metric_type != 'blood_pressure', raw_column))
+        raw_aggregates += [db.func.sum(raw_column), db.func.min(raw_column), db.func.max(raw_column)]
+    tiers.append(
+        db.session.query(HealthMetric.metric_type, db.func.max(HealthMetric.unit), *raw_aggregates)
+        .filter(HealthMetric.user_id == user_id,
+                HealthMetric.timestamp >= since_date,
+                HealthMetric.timestamp < since_hour)
+        .group_by(HealthMetric.metric_type)
+    )
+
+    totals = {}
+    for tier in tiers:
+        for metric_type, unit, count, *stats in tier:
+            total = totals.setdefault(metric_type, {'count': 0, 'unit': unit})
+            total['count'] += count
+            for i, field in enumerate(ROLLUP_FIELDS):
+                field_sum, field_min, field_max = stats[3 * i:3 * i + 3]
+                if field_sum is None:
+                    continue
+                total[f'{field}_sum'] = total.get(f'{field}_sum', 0) + field_sum
+                total[f'{field}_min'] = min(total.get(f'{field}_min', field_min), field_min)
+                total[f'{field}_max'] = max(total.get(f'{field}_max', field_max), field_max)
+
+    summary = {}
+    for metric_type, total in totals.items():
+        count = total['count']
+        fields = ['systolic', 'diastolic'] if metric_type == 'blood_pressure' else ['value']
+        statistics = {
+            field: {
+                'avg': total[f'{field}_sum'] / count,
+                'min': total[f'{field}_min'],
+                'max': total[f'{field}_max']
+            } for field in fields if f'{field}_sum' in total
+        }
+        summary[metric_type] = {
+            'count': count,
+            'unit': total['unit'],
+            'statistics': statistics if metric_type == 'blood_pressure' else statistics.get('value', {})
+        }
+    return summary
+
+def serialize_rollup(rollup):
+    """Render a rollup bucket like a reading: averages plus the bucket's min/max"""
+    item = {
+        'type': rollup.metric_type,
+        'resolution': rollup.resolution,
+        'timestamp': rollup.bucket_start.isoformat(),
+        'count': rollup.reading_count,
+        'unit': rollup.unit
+    }
+    fields = ['systolic', 'diastolic'] if rollup.metric_type == 'blood_pressure' else ['value']
+    for field in fields:
+        field_sum = getattr(rollup, f'{field}_sum')
+        item[field] = field_sum / rollup.reading_count if field_sum is not None else None
+        item[f'{field}_min'] = getattr(rollup, f'{field}_min')
+        item[f'{field}_max'] = getattr(rollup, f'{field}_max')
+    return item
+
 # Health Metrics Routes
-@app.route('/api/health/metrics', methods=['POST'])
-@api_login_required
-def log_health_metric():
-    current_user = get_current_user()
-    data = request.get_json()
-    
+VALID_METRICS = ['blood_pressure', 'heart_rate', 'weight', 'blood_sugar', 'temperature', 'oxygen_level']
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def validate_metric_reading(data):
+    """Validate one reading payload, returning (HealthMetric column values, error message)"""
+    if not isinstance(data, dict):
+        return None, 'Reading must be a JSON object'
+
     # Validate metric type
-    valid_metrics = ['blood_pressure', 'heart_rate', 'weight', 'blood_sugar', 'temperature', 'oxygen_level']
-    if data['metric_type'] not in valid_metrics:
-        return jsonify({'error': f'Invalid metric type. Must be one of: {", ".join(valid_metrics)}'}), 400
-    
+    if data.get('metric_type') not in VALID_METRICS:
+        return None, f'Invalid metric type. Must be one of: {", ".join(VALID_METRICS)}'
+
     # Special handling for blood pressure
     if data['metric_type'] == 'blood_pressure':
         if 'systolic' not in data or 'diastolic' not in data:
-            return jsonify({'error': 'Blood pressure requires both systolic and diastolic values'}), 400
-            
-        metric = HealthMetric(
-            user_id=current_user.id,
-            metric_type=data['metric_type'],
-            value=0,  # Not used for blood pressure
-            unit='mmHg',
-            systolic=data['systolic'],
-            diastolic=data['diastolic'],
-            additional_notes=data.get('notes')
-        )
+            return None, 'Blood pressure requires both systolic and diastolic values'
+        if not is_number(data['systolic']) or not is_number(data['diastolic']):
+            return None, 'Systolic and diastolic values must be numbers'
+        values = {
+            'value': 0,  # Not used for blood pressure
+            'unit': 'mmHg',
+            'systolic': data['systolic'],
+            'diastolic': data['diastolic']
+        }
     else:
-        # Handle other metrics
-        metric = HealthMetric(
-            user_id=current_user.id,
-            metric_type=data['metric_type'],
-            value=data['value'],
-            unit=data['unit'],
-            additional_notes=data.get('notes')
-        )
+        if 'value' not in data or 'unit' not in data:
+            return None, 'Metric requires both value and unit'
+        if not is_number(data['value']):
+            return None, 'Metric value must be a number'
+        values = {'value': data['value'], 'unit': data['unit'], 'systolic': None, 'diastolic': None}
+
+    values['metric_type'] = data['metric_type']
+    values['additional_notes'] = data.get('notes')
+    return values, None
+
+@app.route('/api/health/metrics', methods=['POST'])
+@api_login_required
+def log_health_metric():
+    current_user = get_current_user()
+    data = request.get_json()
+
+    values, error = validate_metric_reading(data)
+    if error:
+        return jsonify({'error': error}), 400
+
+    metric = HealthMetric(user_id=current_user.id, **values)
     
     db.session.add(metric)
+    db.session.flush()  # assigns the default timestamp
+    apply_rollups(accumulate_rollups([metric]))
     db.session.commit()
+    invalidate_health_alerts(current_user.id)
+    alerts = alert_on_new_readings(current_user, [metric])
     
     return jsonify({
         'message': 'Health metric logged successfully',
-        'metric_id': metric.id
+        'metric_id': metric.id,
+        'alerts': alerts
     }), 201
 
+def iter_batch_readings():
+    """Yield reading payloads from a JSON array/{"readings": [...]} body or an NDJSON stream"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None  # reported as an invalid reading
+        return
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('readings')
+    if not isinstance(data, list):
+        raise ValueError('Body must be a JSON array of readings, {"readings": [...]}, or NDJSON')
+    yield from data
+
+def insert_metric_chunk(user_id, chunk, results):
+    """Bulk insert one chunk of validated readings, skipping already-seen idempotency keys"""
+    try:
+        return _insert_metric_chunk(user_id, chunk, results)
+    except IntegrityError:
+        # A concurrent retry inserted one of the keys first; re-check and report it as duplicate
+        db.session.rollback()
+        return _insert_metric_chunk(user_id, chunk, results)
+
+def _insert_metric_chunk(user_id, chunk, results):
+    """Returns the inserted readings (with ids) for alert evaluation"""
+    keys = [row['idempotency_key'] for _, row in chunk if row['idempotency_key']]
+    seen = set()
+    if keys:
+        seen = {key for (key,) in db.session.query(HealthMetric.idempotency_key).filter(
+            HealthMetric.user_id == user_id,
+            HealthMetric.idempotency_key.in_(keys)
+        )}
+
+    rows, row_indexes = [], []
+    for index, row in chunk:
+        key = row['idempotency_key']
+        if key and key in seen:
+            results[index] = {'index': index, 'status': 'duplicate'}
+            continue
+        if key:
+            seen.add(key)
+        rows.append(row)
+        row_indexes.append(index)
+
+    readings = []
+    if rows:
+        inserted = db.session.execute(
+            db.insert(HealthMetric).returning(HealthMetric.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+        readings = [SimpleNamespace(id=metric_id, **row) for metric_id, row in zip(inserted, rows)]
+        apply_rollups(accumulate_rollups(readings))
+        for index, metric_id in zip(row_indexes, inserted):
+            results[index] = {'index': index, 'status': 'created', 'metric_id': metric_id}
+    db.session.commit()
+    return readings
+
+@app.route('/api/health/metrics/batch', methods=['POST'])
+@api_login_required
+def log_health_metrics_batch():
+    """Ingest many readings at once (device gateways), one bulk insert per chunk"""
+    current_user = get_current_user()
+    max_readings = app.config['HEALTH_BATCH_MAX_READINGS']
+    chunk_size = app.config['HEALTH_BATCH_CHUNK_SIZE']
+
+    # Read (at most one past) the whole batch first, so an oversized one stores nothing
+    try:
+        payloads = list(islice(iter_batch_readings(), max_readings + 1))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if len(payloads) > max_readings:
+        return jsonify({'error': f'Batch exceeds {max_readings} readings; nothing was stored'}), 413
+
+    results = {}
+    chunk = []
+    readings = []
+    for index, data in enumerate(payloads):
+        values, error = validate_metric_reading(data)
+        timestamp = datetime.utcnow()
+        key = data.get('idempotency_key') if isinstance(data, dict) else None
+        if not error and data.get('timestamp'):
+            try:
+                timestamp = datetime.fromisoformat(data['timestamp'])
+                if timestamp.tzinfo:
+                    timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            except (TypeError, ValueError):
+                error = 'Timestamp must be an ISO 8601 string'
+        if not error and key is not None and (not isinstance(key, str) or len(key) > 100):
+            error = 'Idempotency key must be a string of at most 100 characters'
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+            continue
+
+        chunk.append((index, {
+            **values,
+            'user_id': current_user.id,
+            'timestamp': timestamp,
+            'idempotency_key': key
+        }))
+        if len(chunk) >= chunk_size:
+            readings += insert_metric_chunk(current_user.id, chunk, results)
+            chunk = []
+
+    if chunk:
+        readings += insert_metric_chunk(current_user.id, chunk, results)
+    invalidate_health_alerts(current_user.id)
+    alerts = alert_on_new_readings(current_user, readings)
+
+    ordered = [results[index] for index in sorted(results)]
+    return jsonify({
+        'created': sum(1 for result in ordered if result['status'] == 'created'),
+        'duplicates': sum(1 for result in ordered if result['status'] == 'duplicate'),
+        'errors': sum(1 for result in ordered if result['status'] == 'error'),
+        'results': ordered,
+        'alerts': alerts
+    })
+
+HEALTH_METRIC_SCHEMA = RowSchema(
+    ('id', HealthMetric.id),
+    ('type', HealthMetric.metric_type),
+    ('value', db.case((HealthMetric.metric_type != 'blood_pressure', HealthMetric.value))),
+    ('systolic', db.case((HealthMetric.metric_type == 'blood_pressure', HealthMetric.systolic))),
+    ('diastolic', db.case((HealthMetric.metric_type == 'blood_pressure', HealthMetric.diastolic))),
+    ('unit', HealthMetric.unit),
+    ('notes', HealthMetric.additional_notes),
+    ('timestamp', HealthMetric.timestamp)
+)
+
 @app.route('/api/health/metrics', methods=['GET'])
 @api_login_required
 def get_health_metrics():
     current_user = get_current_user()
     metric_type = request.args.get('type')
     days = request.args.get('days', type=int, default=7)
+    resolution = request.args.get('resolution') or choose_resolution(days)  # raw, hour, day
+    if resolution not in ['raw'] + ROLLUP_RESOLUTIONS:
+        return jsonify({'error': 'Resolution must be one of: raw, hour, day'}), 400
+
+    # Paginated only when asked for; otherwise the whole window is returned as before
+    paginated = 'per_page' in request.args or 'cursor' in request.args
+    per_page, cursor, include_total = pagination_args(default_per_page=MAX_PER_PAGE)
+
+    if resolution != 'raw':
+        query = db.select(HealthMetricRollup).where(
+            HealthMetricRollup.user_id == current_user.id,
+            HealthMetricRollup.resolution == resolution
+        )
+        if metric_type:
+            query = query.where(HealthMetricRollup.metric_type == metric_type)
+        if days:
+            since_date = rollup_bucket(datetime.utcnow() - timedelta(days=days), resolution)
+            query = query.where(HealthMetricRollup.bucket_start >= since_date)
+        order = [(HealthMetricRollup.bucket_start, True), (HealthMetricRollup.id, True)]
+        if not paginated:
+            rollups = db.session.scalars(query.order_by(*keyset_order_by(order)))
+            return jsonify([serialize_rollup(rollup) for rollup in rollups])
+        after = decode_keyset_cursor(cursor, order) if cursor else None
+        if cursor and after is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        rows, next_cursor, total = keyset_page(query, order, per_page, after, include_total)
+        return json_response([serialize_rollup(row[0]) for row in rows],
+                             headers=pagination_headers(next_cursor, total))
     
-    # Base query
-    query = HealthMetric.query.filter_by(user_id=current_user.id)
-    
-    # Apply filters
+    query = HEALTH_METRIC_SCHEMA.select().where(HealthMetric.user_id == current_user.id)
     if metric_type:
-        query = query.filter_by(metric_type=metric_type)
+        query = query.where(HealthMetric.metric_type == metric_type)
     if days:
         since_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(HealthMetric.timestamp >= since_date)
-    
-    metrics = query.order_by(HealthMetric.timestamp.desc()).all()
-    
-    return jsonify([{
-        'id': metric.id,
-        'type': metric.metric_type,
-        'value': metric.value if metric.metric_type != 'blood_pressure' else None,
-        'systolic': metric.systolic if metric.metric_type == 'blood_pressure' else None,
-        'diastolic': metric.diastolic if metric.metric_type == 'blood_pressure' else None,
-        'unit': metric.unit,
-        'notes': metric.additional_notes,
-        'timestamp': metric.timestamp.isoformat()
-    } for metric in metrics])
+        query = query.where(HealthMetric.timestamp >= since_date)
+    order = [(HealthMetric.timestamp, True), (HealthMetric.id, True)]
+    if not paginated:
+        return stream_json_array(HEALTH_METRIC_SCHEMA, query.order_by(*keyset_order_by(order)))
+
+    after = decode_keyset_cursor(cursor, order) if cursor else None
+    if cursor and after is None:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    rows, next_cursor, total = keyset_page(query, order, per_page, after, include_total)
+    return json_response(HEALTH_METRIC_SCHEMA.dicts(rows), headers=pagination_headers(next_cursor, total))
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+def encode_csv_rows(dicts, header=False):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=HEALTH_METRIC_SCHEMA.keys)
+    if header:
+        writer.writeheader()
+    for item in dicts:
+        item['timestamp'] = item['timestamp'].isoformat() if item['timestamp'] else None
+        writer.writerow(item)
+    return buffer.getvalue().encode()
+
+@app.route('/api/health/metrics/export', methods=['GET'])
+@api_login_required
+def export_health_metrics():
+    """Stream a patient's full reading history, oldest first, as CSV or NDJSON.
+
+    An interrupted export resumes with ?after=<timestamp of the last row received>
+    (and &after_id=<its id> to resume exactly among readings sharing that timestamp).
+    """
+    current_user = get_current_user()
+    user_id = request.args.get('user_id', current_user.id, type=int)
+    if not can_access_patient(current_user, user_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be one of: csv, ndjson'}), 400
+    metric_type = request.args.get('type')
+    if metric_type and metric_type not in VALID_METRICS:
+        return jsonify({'error': 'Invalid metric type'}), 400
+
+    query = HEALTH_METRIC_SCHEMA.select().where(HealthMetric.user_id == user_id)
+    if metric_type:
+        query = query.where(HealthMetric.metric_type == metric_type)
+    if request.args.get('after'):
+        try:
+            after = datetime.fromisoformat(request.args['after'])
+        except ValueError:
+            return jsonify({'error': 'after must be an ISO 8601 timestamp'}), 400
+        after_id = request.args.get('after_id', type=int)
+        if after_id is not None:
+            query = query.where(keyset_filter(
+                [(HealthMetric.timestamp, False), (HealthMetric.id, False)], [after, after_id]
+            ))
+        else:
+            query = query.where(HealthMetric.timestamp > after)
+    query = query.order_by(HealthMetric.timestamp, HealthMetric.id)
+
+    def generate():
+        if export_format == 'csv':
+            yield encode_csv_rows([], header=True)
+        for dicts in iter_row_dicts(HEALTH_METRIC_SCHEMA, query):
+            if export_format == 'csv':
+                yield encode_csv_rows(dicts)
+            else:
+                yield b''.join(dumps_json(item) + b'\n' for item in dicts)
+
+    filename = f'health-metrics-{user_id}.{export_format}'
+    return streaming_response(generate(), EXPORT_FORMATS[export_format], {
+        'Content-Disposition': f'attachment; filename={filename}'
+    })
 
 @app.route('/api/health/summary', methods=['GET'])
 @api_login_required
@@ -1007,130 +4073,384 @@ def get_health_summary():
     current_user = get_current_user()
     days = request.args.get('days', type=int, default=7)
     since_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Get metrics for the specified period
-    metrics = HealthMetric.query.filter(
-        HealthMetric.user_id == current_user.id,
-        HealthMetric.timestamp >= since_date
-    ).all()
-    
-    # Group metrics by type
-    summary = {}
-    for metric in metrics:
-        if metric.metric_type not in summary:
-            summary[metric.metric_type] = {
-                'count': 0,
-                'values': [],
-                'unit': metric.unit
-            }
-        
-        summary[metric.metric_type]['count'] += 1
-        if metric.metric_type == 'blood_pressure':
-            summary[metric.metric_type]['values'].append({
-                'systolic': metric.systolic,
-                'diastolic': metric.diastolic,
-                'timestamp': metric.timestamp.isoformat()
-            })
-        else:
-            summary[metric.metric_type]['values'].append({
-                'value': metric.value,
-                'timestamp': metric.timestamp.isoformat()
-            })
-    
-    # Calculate statistics for each metric type
-    for metric_type, data in summary.items():
-        if metric_type == 'blood_pressure':
-            systolic_values = [v['systolic'] for v in data['values']]
-            diastolic_values = [v['diastolic'] for v in data['values']]
-            
-            data['statistics'] = {
-                'systolic': {
-                    'avg': sum(systolic_values) / len(systolic_values),
-                    'min': min(systolic_values),
-                    'max': max(systolic_values)
-                },
-                'diastolic': {
-                    'avg': sum(diastolic_values) / len(diastolic_values),
-                    'min': min(diastolic_values),
-                    'max': max(diastolic_values)
-                }
-            }
-        else:
-            values = [v['value'] for v in data['values']]
-            data['statistics'] = {
-                'avg': sum(values) / len(values),
-                'min': min(values),
-                'max': max(values)
-            }
-    
+    resolution = choose_resolution(days)
+
+    # Statistics come from rollups; the series is raw for short windows, bucketed otherwise
+    summary = summarize_metric_window(current_user.id, since_date)
+    for data in summary.values():
+        data['values'] = []
+
+    if resolution == 'raw':
+        metrics = HealthMetric.query.filter(
+            HealthMetric.user_id == current_user.id,
+            HealthMetric.timestamp >= since_date
+        ).order_by(HealthMetric.timestamp).all()
+        for metric in metrics:
+            if metric.metric_type == 'blood_pressure':
+                value = {'systolic': metric.systolic, 'diastolic': metric.diastolic}
+            else:
+                value = {'value': metric.value}
+            value['timestamp'] = metric.timestamp.isoformat()
+            if metric.metric_type in summary:
+                summary[metric.metric_type]['values'].append(value)
+    else:
+        rollups = HealthMetricRollup.query.filter(
+            HealthMetricRollup.user_id == current_user.id,
+            HealthMetricRollup.resolution == resolution,
+            HealthMetricRollup.bucket_start >= rollup_bucket(since_date, resolution)
+        ).order_by(HealthMetricRollup.bucket_start).all()
+        for rollup in rollups:
+            if rollup.metric_type in summary:
+                summary[rollup.metric_type]['values'].append(serialize_rollup(rollup))
+
     return jsonify({
         'period_days': days,
+        'resolution': resolution,
         'metrics': summary
     })
 
-@app.route('/api/health/alerts', methods=['GET'])
+# Health metric trends (vectorized over column arrays)
+TREND_FIELDS = {'blood_pressure': ['systolic', 'diastolic']}
+TREND_MIN_BASELINE = 3  # readings needed in the trailing window before z-scores are reported
+
+def load_metric_columns(user_id, since_date, metric_type=None):
+    """Fetch readings as per-type NumPy column arrays.
+
+    Each metric type is one seek on the (user_id, metric_type, timestamp) index
+    selecting only the fields that type uses. Timestamps come back from SQLite as
+    epoch seconds (julianday), so no per-row datetime parsing, ORM objects or
+    Row wrappers are involved and rows are flattened straight into a float array.
+    """
+    epoch_seconds = (db.func.julianday(HealthMetric.timestamp) - 2440587.5) * 86400.0
+    metric_types = [metric_type] if metric_type else VALID_METRICS
+    result = {}
+    for name in metric_types:
+        fields = TREND_FIELDS.get(name, ['value'])
+        field_columns = [getattr(HealthMetric, field) for field in fields]
+        query = db.select(epoch_seconds, *field_columns).where(
+            HealthMetric.user_id == user_id,
+            HealthMetric.metric_type == name,
+            HealthMetric.timestamp >= since_date,
+            *(field_column.isnot(None) for field_column in field_columns)
+        ).order_by(HealthMetric.timestamp)
+        # Plain floats need no result processing, so read the DBAPI cursor directly
+        result_proxy = db.session.connection().execute(query)
+        try:
+            rows = result_proxy.cursor.fetchall()
+        finally:
+            result_proxy.close()
+        if not rows:
+            continue
+        width = len(fields) + 1
+        flat = np.fromiter(chain.from_iterable(rows), dtype=float, count=len(rows) * width).reshape(-1, width)
+        result[name] = {'t': flat[:, 0], **{field: flat[:, i + 1] for i, field in enumerate(fields)}}
+    return result
+
+def analyze_series(t, x, window_seconds, z_threshold, band_sigma, max_points):
+    """Trailing-window mean/std bands, z-score anomalies and linear slope for one series"""
+    n = len(x)
+    # Centre before taking cumulative sums to keep the variance numerically stable
+    center = x.mean()
+    centered = x - center
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    csq = np.concatenate(([0.0], np.cumsum(centered ** 2)))
+
+    # Baseline for reading i is every reading in [t_i - window, t_i), excluding itself
+    index = np.arange(n)
+    start = np.searchsorted(t, t - window_seconds, side='left')
+    count = index - start
+    has_baseline = count >= TREND_MIN_BASELINE
+    safe_count = np.maximum(count, 1)
+    window_sum = csum[index] - csum[start]
+    mean = window_sum / safe_count
+    variance = np.maximum((csq[index] - csq[start]) / safe_count - mean ** 2, 0.0)
+    std = np.sqrt(variance)
+    mean += center
+
+    z = np.full(n, np.nan)
+    usable = has_baseline & (std > 0)
+    z[usable] = (x[usable] - mean[usable]) / std[usable]
+    anomalies = np.flatnonzero(np.abs(np.nan_to_num(z)) >= z_threshold)
+    # Report the strongest anomalies first when there are many
+    anomalies = anomalies[np.argsort(-np.abs(z[anomalies]))][:100]
+
+    days = (t - t[0]) / 86400.0
+    slope = float(np.polyfit(days, x, 1)[0]) if n > 1 and days[-1] > 0 else 0.0
+
+    # Down-sample the series to at most max_points evenly spaced readings
+    sample = np.unique(np.linspace(0, n - 1, min(n, max_points)).astype(int))
+    to_iso = lambda seconds: datetime.fromtimestamp(round(float(seconds), 3), timezone.utc).replace(tzinfo=None).isoformat()
+    return {
+        'count': n,
+        'mean': float(x.mean()),
+        'std': float(x.std()),
+        'min': float(x.min()),
+        'max': float(x.max()),
+        'slope_per_day': slope,
+        'series': [{
+            'timestamp': to_iso(t[i]),
+            'value': float(x[i]),
+            'rolling_mean': float(mean[i]) if has_baseline[i] else None,
+            'lower': float(mean[i] - band_sigma * std[i]) if has_baseline[i] else None,
+            'upper': float(mean[i] + band_sigma * std[i]) if has_baseline[i] else None
+        } for i in sample],
+        'anomalies': [{
+            'timestamp': to_iso(t[i]),
+            'value': float(x[i]),
+            'z_score': float(z[i])
+        } for i in sorted(anomalies)]
+    }
+
+def compute_metric_trends(user_id, since_date, metric_type=None, window_hours=24,
+                          z_threshold=3.0, band_sigma=2.0, max_points=500):
+    """Trend analytics for every metric (and both blood pressure components) in the window"""
+    trends = {}
+    for name, columns in load_metric_columns(user_id, since_date, metric_type).items():
+        trends[name] = {
+            field: analyze_series(columns['t'], columns[field], window_hours * 3600.0,
+                                  z_threshold, band_sigma, max_points)
+            for field in TREND_FIELDS.get(name, ['value'])
+        }
+    return trends
+
+@app.route('/api/health/trends', methods=['GET'])
 @api_login_required
-def check_health_alerts():
+def get_health_trends():
     current_user = get_current_user()
-    
-    # Define normal ranges for different metrics
-    normal_ranges = {
-        'blood_pressure': {
-            'systolic': {'min': 90, 'max': 140},
-            'diastolic': {'min': 60, 'max': 90}
-        },
-        'heart_rate': {'min': 60, 'max': 100},
-        'blood_sugar': {'min': 70, 'max': 140},
-        'temperature': {'min': 36.1, 'max': 37.2},
-        'oxygen_level': {'min': 95, 'max': 100}
+    days = min(max(request.args.get('days', 30, type=int), 1), 366)
+    metric_type = request.args.get('type')
+    window_hours = request.args.get('window_hours', 24, type=float)
+    z_threshold = request.args.get('z', 3.0, type=float)
+    band_sigma = request.args.get('band_sigma', 2.0, type=float)
+    max_points = min(max(request.args.get('max_points', 500, type=int), 2), 5000)
+    if window_hours <= 0 or z_threshold <= 0 or band_sigma <= 0:
+        return jsonify({'error': 'window_hours, z and band_sigma must be positive'}), 400
+    if metric_type and metric_type not in VALID_METRICS:
+        return jsonify({'error': 'Invalid metric type'}), 400
+
+    since_date = datetime.utcnow() - timedelta(days=days)
+    trends = compute_metric_trends(current_user.id, since_date, metric_type, window_hours,
+                                   z_threshold, band_sigma, max_points)
+    return jsonify({
+        'period_days': days,
+        'window_hours': window_hours,
+        'metrics': trends
+    })
+
+# Health alert rules
+DEFAULT_HEALTH_RANGES = {
+    'blood_pressure': {
+        'systolic': {'min': 90, 'max': 140},
+        'diastolic': {'min': 60, 'max': 90}
+    },
+    'heart_rate': {'value': {'min': 60, 'max': 100}},
+    'blood_sugar': {'value': {'min': 70, 'max': 140}},
+    'temperature': {'value': {'min': 36.1, 'max': 37.2}},
+    'oxygen_level': {'value': {'min': 95, 'max': 100}}
+}
+
+health_alert_cache = TTLCache(
+    maxsize=app.config['HEALTH_ALERT_CACHE_SIZE'],
+    ttl=app.config['HEALTH_ALERT_CACHE_TTL'],
+    generations=cache_generations('health_alerts')
+)
+
+def invalidate_health_alerts(user_id, ranges=False):
+    """Forget cached alert results after a new reading, and the ranges after a rule change"""
+    health_alert_cache.pop(('alerts', user_id))
+    if ranges:
+        health_alert_cache.pop(('ranges', user_id))
+
+def get_health_ranges(user_id):
+    """Default normal ranges with the user's overrides applied"""
+    def load():
+        ranges = {
+            metric_type: {field: dict(bounds) for field, bounds in fields.items()}
+            for metric_type, fields in DEFAULT_HEALTH_RANGES.items()
+        }
+        for rule in HealthAlertRule.query.filter_by(user_id=user_id):
+            bounds = ranges.setdefault(rule.metric_type, {}).setdefault(rule.field, {})
+            if rule.min_value is not None:
+                bounds['min'] = rule.min_value
+            if rule.max_value is not None:
+                bounds['max'] = rule.max_value
+        return ranges
+    return health_alert_cache.get_or_load(('ranges', user_id), load)
+
+def evaluate_reading(reading, ranges):
+    """Return an alert dict if the reading is outside its normal range, else None"""
+    fields = ranges.get(reading.metric_type)
+    if not fields:
+        return None
+
+    for field, bounds in fields.items():
+        value = getattr(reading, field)
+        if value is None:
+            continue
+        if ('min' in bounds and value < bounds['min']) or ('max' in bounds and value > bounds['max']):
+            break
+    else:
+        return None
+
+    if reading.metric_type == 'blood_pressure':
+        message = f'Blood pressure reading ({reading.systolic}/{reading.diastolic}) is outside normal range'
+    else:
+        message = f'{reading.metric_type.replace("_", " ").title()} reading ({reading.value}) is outside normal range'
+    return {
+        'metric_type': reading.metric_type,
+        'metric_id': reading.id,
+        'message': message,
+        'timestamp': reading.timestamp.isoformat()
     }
-    
-    # Get latest metrics
-    alerts = []
-    for metric_type, ranges in normal_ranges.items():
-        latest_metric = HealthMetric.query.filter_by(
-            user_id=current_user.id,
-            metric_type=metric_type
-        ).order_by(HealthMetric.timestamp.desc()).first()
-        
-        if latest_metric:
-            if metric_type == 'blood_pressure':
-                if (latest_metric.systolic < ranges['systolic']['min'] or 
-                    latest_metric.systolic > ranges['systolic']['max'] or
-                    latest_metric.diastolic < ranges['diastolic']['min'] or
-                    latest_metric.diastolic > ranges['diastolic']['max']):
-                    alerts.append({
-                        'metric_type': metric_type,
-                        'message': f'Blood pressure reading ({latest_metric.systolic}/{latest_metric.diastolic}) is outside normal range',
-                        'timestamp': latest_metric.timestamp.isoformat()
-                    })
-            else:
-                if latest_metric.value < ranges['min'] or latest_metric.value > ranges['max']:
-                    alerts.append({
-                        'metric_type': metric_type,
-                        'message': f'{metric_type.replace("_", " ").title()} reading ({latest_metric.value}) is outside normal range',
-                        'timestamp': latest_metric.timestamp.isoformat()
-                    })
-    
-    # Add this block here - Send email if there are any alerts
-    if len(alerts) > 0:
+
+def latest_readings(user_id, metric_types):
+    """Latest reading of each metric type in one statement (one index seek per type)"""
+    latest_ids = [
+        db.select(HealthMetric.id)
+        .where(HealthMetric.user_id == user_id, HealthMetric.metric_type == metric_type)
+        .order_by(HealthMetric.timestamp.desc(), HealthMetric.id.desc())
+        .limit(1)
+        .subquery()
+        for metric_type in metric_types
+    ]
+    if not latest_ids:
+        return []
+    ids = db.union_all(*[db.select(latest.c.id) for latest in latest_ids])
+    return HealthMetric.query.filter(HealthMetric.id.in_(ids)).all()
+
+def notify_health_alerts(user, alerts):
+    """Queue one email per alert whose reading has not been notified yet (atomic across workers)"""
+    for alert in alerts:
+        claimed = HealthMetric.query.filter(
+            HealthMetric.id == alert['metric_id'],
+            HealthMetric.alert_notified_at.is_(None)
+        ).update({HealthMetric.alert_notified_at: datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            send_health_alert_email(user, alert)
+
+def push_health_alerts(user, alerts):
+    """Push alerts to the patient and their emergency contacts who are connected over Socket.IO"""
+    recipients = {user.id}
+    recipients.update(contact.contact_id for contact in get_emergency_contact_set(user.id))
+    payload = {'user_id': user.id, 'user_name': user.name, 'alerts': alerts}
+    socketio.emit('health_alert', payload, to=[user_room(recipient_id) for recipient_id in recipients])
+
+def alert_on_new_readings(user, readings):
+    """Evaluate freshly written readings; alerts on readings that are now the user's latest
+    of their metric are pushed live and emailed, back-dated ones are only returned"""
+    ranges = get_health_ranges(user.id)
+    alerts = [alert for alert in (evaluate_reading(reading, ranges) for reading in readings) if alert]
+    if not alerts:
+        return []
+
+    # A back-dated reading (e.g. a gateway syncing old data) says nothing about the
+    # patient's current state, so compare against the stored latest reading per metric
+    latest_ids = {reading.id for reading in latest_readings(user.id, sorted({alert['metric_type'] for alert in alerts}))}
+    current = [alert for alert in alerts if alert['metric_id'] in latest_ids]
+    if not current:
+        return alerts
+    try:
+        push_health_alerts(user, current)
+        notify_health_alerts(user, current)
+    except Exception as e:
+        # The reading is stored; polling /api/health/alerts still surfaces the alert
+        print(f"Failed to deliver health alerts: {str(e)}")
+    return alerts
+
+def evaluate_health_alerts(user):
+    """Current alerts for a user's latest readings, cached until the next reading"""
+    def load():
+        ranges = get_health_ranges(user.id)
+        alerts = [alert for alert in (evaluate_reading(reading, ranges)
+                                      for reading in latest_readings(user.id, list(ranges)))
+                  if alert]
+        alerts.sort(key=lambda alert: list(ranges).index(alert['metric_type']))
         try:
-            send_health_alert_email(current_user, alerts[0])  # Send alert for the first detected issue
+            notify_health_alerts(user, alerts)
         except Exception as e:
             # Log the error but don't prevent the API from returning alerts
             print(f"Failed to send health alert email: {str(e)}")
+        return alerts
+    return health_alert_cache.get_or_load(('alerts', user.id), load)
+
+@app.route('/api/health/alerts', methods=['GET'])
+@api_login_required
+def check_health_alerts():
+    current_user = get_current_user()
+    alerts = evaluate_health_alerts(current_user)
     
     return jsonify({
         'has_alerts': len(alerts) > 0,
         'alerts': alerts
     })
 
+@app.route('/api/health/alert-rules', methods=['GET'])
+@api_login_required
+def get_health_alert_rules():
+    current_user = get_current_user()
+    user_id = request.args.get('user_id', current_user.id, type=int)
+    if not can_access_patient(current_user, user_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return jsonify({'user_id': user_id, 'ranges': get_health_ranges(user_id)})
+
+@app.route('/api/health/alert-rules', methods=['PUT'])
+@api_login_required
+def update_health_alert_rules():
+    """Override normal ranges for a user, e.g. {"rules": {"heart_rate": {"value": {"min": 50}}}}
+
+    Set a field to null to go back to the default range.
+    """
+    current_user = get_current_user()
+    data = request.get_json() or {}
+    user_id = data.get('user_id', current_user.id)
+    if not is_json_int(user_id):
+        return jsonify({'error': 'user_id must be an integer'}), 400
+    if not can_access_patient(current_user, user_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    rules = data.get('rules')
+    if not isinstance(rules, dict):
+        return jsonify({'error': 'rules must be an object keyed by metric type'}), 400
+
+    existing = {
+        (rule.metric_type, rule.field): rule
+        for rule in HealthAlertRule.query.filter_by(user_id=user_id)
+    }
+    for metric_type, fields in rules.items():
+        if metric_type not in VALID_METRICS or not isinstance(fields, dict):
+            return jsonify({'error': f'Invalid metric type: {metric_type}'}), 400
+        allowed_fields = ['systolic', 'diastolic'] if metric_type == 'blood_pressure' else ['value']
+        for field, bounds in fields.items():
+            if field not in allowed_fields:
+                return jsonify({'error': f'Invalid field for {metric_type}: {field}'}), 400
+            rule = existing.get((metric_type, field))
+            if bounds is None:
+                if rule:
+                    db.session.delete(rule)
+                continue
+            if not isinstance(bounds, dict) or not all(
+                    bounds.get(bound) is None or is_number(bounds[bound]) for bound in ('min', 'max')):
+                return jsonify({'error': f'Bounds for {metric_type}.{field} must be numbers'}), 400
+            if not rule:
+                rule = HealthAlertRule(user_id=user_id, metric_type=metric_type, field=field)
+                db.session.add(rule)
+            rule.min_value = bounds.get('min')
+            rule.max_value = bounds.get('max')
+            rule.updated_by = current_user.id
+
+    db.session.commit()
+    invalidate_health_alerts(user_id, ranges=True)
+    return jsonify({'user_id': user_id, 'ranges': get_health_ranges(user_id)})
+
 @app.route('/api/test/email', methods=['POST'])
 @api_login_required
 def test_email():
     """Test endpoint to verify email functionality"""
     try:
         send_welcome_email(request.user)
+        send_mail_outbox()
         return jsonify({'message': 'Test email queued successfully'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1153,7 +4473,8 @@ def start_call():
             return jsonify({'error': 'Invalid callee ID'}), 404
             
         # Generate unique room ID
-        room_id = f"call_{request.user.id}_{callee_id}_{int(datetime.utcnow().timestamp())}"
+        # Random suffix: room ids are unique, and the same pair may call twice within a second
+        room_id = f"call_{request.user.id}_{callee_id}_{int(datetime.utcnow().timestamp())}_{secrets.token_hex(4)}"
         
         # Create call record
         call = Call(
@@ -1165,61 +4486,307 @@ def start_call():
         db.session.add(call)
         db.session.commit()
         
-        # Notify callee if they're online
-        if callee_id in user_sid_mapping:
-            emit('incoming_call', {
+        # Notify callee if they're online, on whichever worker their sockets are connected to
+        callee_online = presence.is_online(callee.id)
+        if callee_online:
+            socketio.emit('incoming_call', {
                 'room_id': room_id,
                 'caller_id': request.user.id,
                 'caller_name': request.user.name
-            }, room=user_sid_mapping[callee_id])
+            }, to=user_room(callee.id))
         
         return jsonify({
             'room_id': room_id,
             'caller_id': request.user.id,
             'callee_id': callee_id,
-            'status': 'initiated'
+            'status': 'initiated',
+            'callee_online': callee_online
         })
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+CALL_CALLER = db.aliased(User, name='caller')
+CALL_CALLEE = db.aliased(User, name='callee')
+CALL_SCHEMA = RowSchema(
+    ('id', Call.id),
+    ('room_id', Call.room_id),
+    ('caller_name', CALL_CALLER.name),
+    ('callee_name', CALL_CALLEE.name),
+    ('start_time', Call.start_time),
+    ('answered_at', Call.answered_at),
+    ('end_time', Call.end_time),
+    ('status', Call.status)
+)
+
+CALL_STATUSES = ['initiated', 'active', 'ended', 'missed']
+
+def call_filters(user_id):
+    """WHERE clauses for the caller's call list from the query string, returning (clauses, error).
+
+    Supports status, direction (incoming/outgoing), counterpart (the other user's id)
+    and since/until (ISO timestamps bounding start_time).
+    """
+    direction = request.args.get('direction')
+    if direction == 'incoming':
+        clauses = [Call.callee_id == user_id]
+    elif direction == 'outgoing':
+        clauses = [Call.caller_id == user_id]
+    elif direction:
+        return None, 'direction must be incoming or outgoing'
+    else:
+        clauses = [db.or_(Call.caller_id == user_id, Call.callee_id == user_id)]
+
+    counterpart = request.args.get('counterpart', type=int)
+    if counterpart is not None:
+        clauses.append(db.or_(
+            db.and_(Call.caller_id == user_id, Call.callee_id == counterpart),
+            db.and_(Call.callee_id == user_id, Call.caller_id == counterpart)
+        ))
+
+    status = request.args.get('status')
+    if status:
+        if status not in CALL_STATUSES:
+            return None, f"status must be one of: {', '.join(CALL_STATUSES)}"
+        clauses.append(Call.status == status)
+
+    try:
+        if request.args.get('since'):
+            clauses.append(Call.start_time >= datetime.fromisoformat(request.args['since']))
+        if request.args.get('until'):
+            clauses.append(Call.start_time < datetime.fromisoformat(request.args['until']))
+    except ValueError:
+        return None, 'since and until must be ISO 8601 timestamps'
+    return clauses, None
+
 @app.route('/api/calls/history', methods=['GET'])
 @api_login_required
 def get_call_history():
     """Get user's call history"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page, cursor, include_total = pagination_args(default_per_page=10)
+        clauses, error = call_filters(request.user.id)
+        if error:
+            return jsonify({'error': error}), 400
         
-        calls = Call.query.filter(
-            db.or_(
-                Call.caller_id == request.user.id,
-                Call.callee_id == request.user.id
-            )
-        ).order_by(Call.start_time.desc()).paginate(page=page, per_page=per_page)
+        # Names come from the same query, so a page is one query (plus COUNT when asked for)
+        query = CALL_SCHEMA.select()\
+            .join(CALL_CALLER, Call.caller_id == CALL_CALLER.id)\
+            .join(CALL_CALLEE, Call.callee_id == CALL_CALLEE.id)\
+            .where(*clauses)
+        order = [(Call.start_time, True), (Call.id, True)]
+        after = decode_keyset_cursor(cursor, order) if cursor else None
+        if cursor and after is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        offset = 0 if cursor else (page - 1) * per_page
+        rows, next_cursor, total = keyset_page(query, order, per_page, after, include_total, offset)
         
-        return jsonify({
-            'total_calls': calls.total,
-            'current_page': calls.page,
-            'total_pages': calls.pages,
-            'calls': [{
-                'id': call.id,
-                'room_id': call.room_id,
-                'caller_name': call.caller.name,
-                'callee_name': call.callee.name,
-                'start_time': call.start_time.isoformat(),
-                'end_time': call.end_time.isoformat() if call.end_time else None,
-                'status': call.status
-            } for call in calls.items]
-        })
+        response = {
+            'calls': CALL_SCHEMA.dicts(rows),
+            'per_page': per_page,
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor
+        }
+        if not cursor:
+            response['page'] = page
+        if include_total:
+            response['total'] = total
+        return json_response(response)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Create database tables
-with app.app_context():
+@app.route('/api/calls/stats', methods=['GET'])
+@api_login_required
+def get_call_stats():
+    """Call counts, talk time and missed call rate in one aggregate query.
+
+    Takes the same filters as /api/calls/history.
+    """
+    user_id = request.user.id
+    clauses, error = call_filters(user_id)
+    if error:
+        return jsonify({'error': error}), 400
+
+    incoming = Call.callee_id == user_id
+    answered = db.and_(Call.answered_at.isnot(None), Call.end_time.isnot(None))
+    # Calls ended before answer tracking: answered or not is unknown, so they count
+    # towards neither answered nor missed calls, talk time or the missed call rate
+    legacy = db.and_(Call.status == 'ended', Call.answered_at.is_(None))
+    talk_seconds = (db.func.julianday(Call.end_time) - db.func.julianday(Call.answered_at)) * 86400.0
+    count_if = lambda condition: db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+    stats = db.session.execute(db.select(
+        db.func.count(Call.id).label('total_calls'),
+        count_if(Call.caller_id == user_id).label('outgoing_calls'),
+        count_if(incoming).label('incoming_calls'),
+        count_if(answered).label('answered_calls'),
+        count_if(db.and_(incoming, Call.status == 'missed')).label('missed_calls'),
+        count_if(legacy).label('legacy_calls'),
+        count_if(db.and_(incoming, legacy)).label('legacy_incoming_calls'),
+        db.func.coalesce(db.func.sum(db.case((answered, talk_seconds))), 0.0).label('total_talk_seconds')
+    ).where(*clauses)).one()
+
+    tracked_incoming = stats.incoming_calls - stats.legacy_incoming_calls
+    return jsonify({
+        'total_calls': stats.total_calls,
+        'outgoing_calls': stats.outgoing_calls,
+        'incoming_calls': stats.incoming_calls,
+        'answered_calls': stats.answered_calls,
+        'missed_calls': stats.missed_calls,
+        'legacy_calls': stats.legacy_calls,
+        # Share of incoming calls that were never picked up
+        'missed_call_rate': stats.missed_calls / tracked_incoming if tracked_incoming else 0.0,
+        'total_talk_seconds': round(stats.total_talk_seconds, 1),
+        'average_talk_seconds': round(stats.total_talk_seconds / stats.answered_calls, 1) if stats.answered_calls else 0.0
+    })
+
+def rebuild_rating_aggregates():
+    """Recompute every caregiver's rating aggregates from the Review table in bulk"""
+    star_counts = [
+        db.func.sum(db.case((Review.rating == star, 1), else_=0)).label(f'rating_{star}_count')
+        for star in range(1, 6)
+    ]
+    stats = {
+        row.caregiver_id: row for row in db.session.query(
+            Review.caregiver_id,
+            db.func.count(Review.id).label('rating_count'),
+            db.func.sum(Review.rating).label('rating_sum'),
+            *star_counts
+        ).group_by(Review.caregiver_id)
+    }
+
+    updates = []
+    for (caregiver_id,) in db.session.query(Caregiver.id):
+        row = stats.get(caregiver_id)
+        values = {'id': caregiver_id}
+        for column in ['rating_count', 'rating_sum'] + [f'rating_{star}_count' for star in range(1, 6)]:
+            values[column] = getattr(row, column) if row else 0
+        updates.append(values)
+
+    if updates:
+        db.session.execute(db.update(Caregiver), updates)
+    db.session.commit()
+    return len(updates)
+
+@app.cli.command('backfill-specializations')
+def backfill_specializations_command():
+    """Rebuild specialization tags from caregivers' specializations text"""
+    count = backfill_specialization_tags()
+    click.echo(f'Linked {count} caregiver specializations')
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Repopulate the caregiver full-text search index"""
+    count = rebuild_caregiver_search_index()
+    click.echo(f'Indexed {count} caregivers')
+
+@app.cli.command('rebuild-health-rollups')
+def rebuild_health_rollups_command():
+    """Recompute hourly and daily health metric rollups from raw readings"""
+    count = rebuild_health_rollups()
+    click.echo(f'Rebuilt {count} health metric rollup buckets')
+
+@app.cli.command('rebuild-ratings')
+def rebuild_ratings_command():
+    """Recompute denormalized caregiver rating aggregates from reviews"""
+    count = rebuild_rating_aggregates()
+    click.echo(f'Rebuilt rating aggregates for {count} caregivers')
+
+class SchemaMigration(db.Model):
+    """Data migrations that have already been applied to this database"""
+    name = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def add_missing_columns():
+    """Add model columns that are missing from existing tables (create_all only creates tables)"""
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                connection.execute(text(ddl))
+
+def create_missing_indexes():
+    """Create indexes declared on the models that existing tables do not have yet"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def dedupe_reviews():
+    """Keep only each reviewer's first review of a caregiver so the unique index can be built"""
+    first_reviews = db.session.query(db.func.min(Review.id))\
+        .group_by(Review.caregiver_id, Review.reviewer_id)
+    deleted = Review.query.filter(Review.id.not_in(first_reviews)).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+def install_and_rebuild_search_index():
+    install_caregiver_search_index()
+    if db.engine.dialect.name == 'sqlite':
+        rebuild_caregiver_search_index()
+
+def clear_legacy_call_answered_at():
+    """Undo the call_answered_at backfill, which stamped calls ended before answered_at
+    existed as answered at their start time. end_call used to mark missed calls ended
+    too, so those calls may never have been answered; call stats leave them out instead.
+    Real answer times are set when the callee joins and never equal the start time."""
+    updated = Call.query.filter(
+        Call.status == 'ended',
+        Call.answered_at == Call.start_time
+    ).update({Call.answered_at: None}, synchronize_session=False)
+    db.session.commit()
+    return updated
+
+# One-off data migrations, applied once each and in this order. Append new ones at the end.
+DATA_MIGRATIONS = [
+    ('dedupe_reviews', dedupe_reviews),
+    ('rating_aggregates', rebuild_rating_aggregates),
+    ('specialization_tags', backfill_specialization_tags),
+    ('caregiver_search_index', install_and_rebuild_search_index),
+    ('health_metric_rollups', rebuild_health_rollups),
+    ('legacy_call_answered_at', clear_legacy_call_answered_at),
+]
+
+def upgrade_database():
+    """Bring the database schema and data up to date with the models.
+
+    Missing tables and columns are created first, then pending data migrations run,
+    and finally declared indexes are built (after data fixes such as review
+    de-duplication have made unique indexes possible). The caregiver leaderboard is
+    rebuilt last, so /api/caregivers/top has data before the beat scheduler runs.
+    """
     db.create_all()
+    add_missing_columns()
+
+    applied = {name for (name,) in db.session.query(SchemaMigration.name)}
+    for name, migrate in DATA_MIGRATIONS:
+        if name in applied:
+            continue
+        result = migrate()
+        db.session.add(SchemaMigration(name=name))
+        db.session.commit()
+        print(f'Applied migration {name}: {result}')
+
+    create_missing_indexes()
+    refresh_leaderboard()
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create or migrate the database schema"""
+    upgrade_database()
+    click.echo('Database is up to date')
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True)       
\ No newline at end of file
+    with app.app_context():
+        upgrade_database()
+    socketio.run(app, debug=True)
@@ -0,0 +1,96 @@
+"""Benchmark /api/health/trends on a year of minute-level readings for one user.
+
+Seeds a scratch SQLite database with one heart-rate reading per minute for a
+year (525,600 rows), then times the trend pipeline and the full endpoint
+against a request budget.
+
+Usage:
+    python bench_health_trends.py [--days 365] [--budget 2.0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+_db_path = os.path.join(tempfile.mkdtemp(), 'bench_trends.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+
+import numpy as np
+import app as caremate
+
+
+def seed(days):
+    """Insert one reading per minute for `days` days; returns the user id"""
+    with caremate.app.app_context():
+        caremate.upgrade_database()
+        user = caremate.User(email='bench@example.com', password_hash='x', user_type='elderly',
+                             name='Bench', phone='0')
+        caremate.db.session.add(user)
+        caremate.db.session.commit()
+
+        minutes = days * 24 * 60
+        start = datetime.utcnow() - timedelta(days=days)
+        rng = np.random.default_rng(42)
+        values = 72 + 6 * np.sin(np.arange(minutes) / 720.0) + rng.normal(0, 2, minutes)
+        values[rng.integers(0, minutes, 50)] += 45  # injected anomalies
+
+        rows = [
+            (user.id, 'heart_rate', float(value), 'bpm', start + timedelta(minutes=i))
+            for i, value in enumerate(values)
+        ]
+        raw = caremate.db.engine.raw_connection()
+        try:
+            raw.executemany(
+                'INSERT INTO health_metric (user_id, metric_type, value, unit, timestamp) VALUES (?, ?, ?, ?, ?)',
+                [(u, m, v, unit, ts.isoformat(sep=' ')) for u, m, v, unit, ts in rows]
+            )
+            raw.commit()
+        finally:
+            raw.close()
+        return user.id, minutes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--budget', type=float, default=2.0, help='seconds allowed per request')
+    args = parser.parse_args()
+
+    user_id, rows = seed(args.days)
+    print(f'Seeded {rows:,} readings')
+
+    with caremate.app.app_context():
+        since = datetime.utcnow() - timedelta(days=args.days + 1)
+
+        started = time.perf_counter()
+        columns = caremate.load_metric_columns(user_id, since)
+        load_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        trends = caremate.compute_metric_trends(user_id, since)
+        pipeline_time = time.perf_counter() - started
+
+    series = trends['heart_rate']['value']
+    print(f'load_metric_columns:   {load_time:.3f}s ({len(columns["heart_rate"]["t"]):,} rows)')
+    print(f'compute_metric_trends: {pipeline_time:.3f}s '
+          f'({len(series["anomalies"])} anomalies, slope {series["slope_per_day"]:.4f}/day)')
+
+    client = caremate.app.test_client()
+    started = time.perf_counter()
+    response = client.get(f'/api/health/trends?days={args.days + 1}',
+                          headers={'Authorization': f'Bearer {user_id}'})
+    request_time = time.perf_counter() - started
+    print(f'GET /api/health/trends: {request_time:.3f}s (HTTP {response.status_code})')
+
+    if response.status_code != 200 or request_time > args.budget:
+        print(f'FAIL: over the {args.budget:.1f}s budget')
+        return 1
+    print(f'OK: within the {args.budget:.1f}s budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
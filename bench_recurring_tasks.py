@@ -0,0 +1,119 @@
+"""Benchmark /api/tasks/upcoming for a user with many long-running recurring schedules.
+
+Seeds a scratch SQLite database with one user holding a few hundred recurring
+tasks (every 8 hours, daily, every other day, Mon/Wed/Fri) that started years
+ago, most past occurrences marked done, plus a backlog of one-off tasks. Times
+/api/tasks/upcoming and a one-week /api/tasks window against a request budget;
+occurrences are expanded per request, so the cost should track the window, not
+the age of the schedules.
+
+Usage:
+    python bench_recurring_tasks.py [--series 300] [--years 3] [--budget 0.1]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+_db_path = os.path.join(tempfile.mkdtemp(), 'bench_recurring_tasks.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+
+import app as caremate
+
+RULES = ['FREQ=HOURLY;INTERVAL=8', 'FREQ=DAILY;INTERVAL=1', 'FREQ=DAILY;INTERVAL=2',
+         'FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,WE,FR']
+
+
+def seed(series, years, one_offs, completed_ratio):
+    """Insert the schedules, their completed past occurrences and one-off tasks;
+    returns (user id, completion rows)"""
+    with caremate.app.app_context():
+        caremate.upgrade_database()
+        user = caremate.User(email='bench@example.com', password_hash='x', user_type='elderly',
+                             name='Bench', phone='0')
+        caremate.db.session.add(user)
+        caremate.db.session.commit()
+
+        now = datetime.utcnow().replace(microsecond=0)
+        start = now - timedelta(days=365 * years)
+        raw = caremate.db.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            completions = []
+            every = round(1 / (1 - completed_ratio)) if completed_ratio < 1 else 0
+            for i in range(series):
+                rule = RULES[i % len(RULES)]
+                dtstart = start + timedelta(minutes=7 * i)
+                cursor.execute(
+                    'INSERT INTO task (user_id, title, description, due_time, is_completed, task_type, recurrence) '
+                    'VALUES (?, ?, ?, ?, 0, ?, ?)',
+                    (user.id, f'Schedule {i}', '', dtstart.isoformat(sep=' '), 'medication', rule)
+                )
+                task_id = cursor.lastrowid
+                for n, occurrence in enumerate(caremate.expand_occurrences(dtstart, rule, None, dtstart, now)):
+                    if not every or n % every:
+                        completions.append((task_id, occurrence.isoformat(sep=' '), 1, occurrence.isoformat(sep=' ')))
+            cursor.executemany(
+                'INSERT INTO task_occurrence (task_id, occurrence_time, is_completed, completed_at) VALUES (?, ?, ?, ?)',
+                completions
+            )
+            cursor.executemany(
+                'INSERT INTO task (user_id, title, description, due_time, is_completed, task_type) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(user.id, f'Task {i}', '', (start + timedelta(hours=i)).isoformat(sep=' '), 1, 'appointment')
+                 for i in range(one_offs)]
+            )
+            raw.commit()
+        finally:
+            raw.close()
+        return user.id, len(completions)
+
+
+def timed(client, path, user_id, repeat):
+    """(median seconds, last response) of `repeat` requests"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, headers={'Authorization': f'Bearer {user_id}'})
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--series', type=int, default=300, help='recurring tasks for the user')
+    parser.add_argument('--years', type=int, default=3, help='how long ago the schedules started')
+    parser.add_argument('--one-offs', type=int, default=20000)
+    parser.add_argument('--completed', type=float, default=0.9, help='share of past occurrences done')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget', type=float, default=0.1, help='seconds allowed per request')
+    args = parser.parse_args()
+
+    user_id, completions = seed(args.series, args.years, args.one_offs, args.completed)
+    print(f'Seeded {args.series} schedules over {args.years} years, {completions:,} completed '
+          f'occurrences and {args.one_offs:,} one-off tasks')
+
+    client = caremate.app.test_client()
+    start = datetime.utcnow().replace(microsecond=0)
+    window = f'start={start.isoformat()}&end={(start + timedelta(days=7)).isoformat()}'
+    failed = False
+    for label, path in [('GET /api/tasks/upcoming', '/api/tasks/upcoming'),
+                        ('GET /api/tasks (one week)', f'/api/tasks?{window}'),
+                        ('GET /api/tasks (one week, page of 50)', f'/api/tasks?{window}&per_page=50')]:
+        median, response = timed(client, path, user_id, args.repeat)
+        print(f'{label}: {median * 1000:.1f}ms median ({len(response.get_json())} rows, HTTP {response.status_code})')
+        failed |= response.status_code != 200 or median > args.budget
+
+    if failed:
+        print(f'FAIL: over the {args.budget * 1000:.0f}ms budget')
+        return 1
+    print(f'OK: within the {args.budget * 1000:.0f}ms budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
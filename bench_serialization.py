@@ -0,0 +1,117 @@
+"""Microbenchmark list-endpoint serialization: ORM objects + jsonify vs column-projected rows.
+
+Seeds a scratch SQLite database with health readings for one user, then renders
+the /api/health/metrics payload for 10k and 100k rows three ways: the previous
+ORM + jsonify path, the RowSchema path with the stdlib encoder, and the RowSchema
+path with orjson (when installed).
+
+Usage:
+    python bench_serialization.py [--sizes 10000 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+_db_path = os.path.join(tempfile.mkdtemp(), 'bench_serialization.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+
+from flask import jsonify
+import app as caremate
+
+
+def seed(rows):
+    """Insert `rows` readings for one user, alternating heart rate and blood pressure"""
+    with caremate.app.app_context():
+        caremate.upgrade_database()
+        user = caremate.User(email='bench@example.com', password_hash='x', user_type='elderly',
+                             name='Bench', phone='0')
+        caremate.db.session.add(user)
+        caremate.db.session.commit()
+
+        start = datetime.utcnow() - timedelta(minutes=rows)
+        raw = caremate.db.engine.raw_connection()
+        try:
+            raw.executemany(
+                'INSERT INTO health_metric (user_id, metric_type, value, systolic, diastolic, unit, '
+                'additional_notes, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (user.id, 'heart_rate', 70.0 + i % 10, None, None, 'bpm', None,
+                     (start + timedelta(minutes=i)).isoformat(sep=' '))
+                    if i % 2 else
+                    (user.id, 'blood_pressure', 0.0, 120.0, 80.0, 'mmHg', 'Morning reading',
+                     (start + timedelta(minutes=i)).isoformat(sep=' '))
+                    for i in range(rows)
+                ]
+            )
+            raw.commit()
+        finally:
+            raw.close()
+        return user.id
+
+
+def legacy_path(user_id, limit):
+    """The previous implementation: full ORM objects, dicts built field by field, jsonify"""
+    metrics = caremate.HealthMetric.query.filter_by(user_id=user_id)\
+        .order_by(caremate.HealthMetric.timestamp.desc()).limit(limit).all()
+    return jsonify([{
+        'id': metric.id,
+        'type': metric.metric_type,
+        'value': metric.value if metric.metric_type != 'blood_pressure' else None,
+        'systolic': metric.systolic if metric.metric_type == 'blood_pressure' else None,
+        'diastolic': metric.diastolic if metric.metric_type == 'blood_pressure' else None,
+        'unit': metric.unit,
+        'notes': metric.additional_notes,
+        'timestamp': metric.timestamp.isoformat()
+    } for metric in metrics]).get_data()
+
+
+def schema_path(user_id, limit):
+    """The RowSchema path used by get_health_metrics, consuming the streamed body"""
+    schema = caremate.HEALTH_METRIC_SCHEMA
+    query = schema.select().where(caremate.HealthMetric.user_id == user_id)\
+        .order_by(caremate.HealthMetric.timestamp.desc()).limit(limit)
+    return b''.join(caremate.stream_json_array(schema, query).response)
+
+
+def timed(function, user_id, limit, repeat):
+    best = None
+    for _ in range(repeat):
+        with caremate.app.test_request_context():
+            started = time.perf_counter()
+            body = function(user_id, limit)
+            elapsed = time.perf_counter() - started
+            caremate.db.session.remove()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3, help='runs per path; the best is reported')
+    args = parser.parse_args()
+
+    user_id = seed(max(args.sizes))
+    orjson = caremate.orjson
+    print(f'{"rows":>8}  {"path":<22} {"best":>8} {"speedup":>8} {"bytes":>11}')
+    for size in args.sizes:
+        baseline, size_bytes = timed(legacy_path, user_id, size, args.repeat)
+        print(f'{size:>8}  {"orm + jsonify":<22} {baseline:>7.3f}s {"1.0x":>8} {size_bytes:>11,}')
+
+        paths = [('schema + json', None)]
+        if orjson is not None:
+            paths.append(('schema + orjson', orjson))
+        for label, encoder in paths:
+            caremate.orjson = encoder
+            elapsed, size_bytes = timed(schema_path, user_id, size, args.repeat)
+            print(f'{size:>8}  {label:<22} {elapsed:>7.3f}s {baseline / elapsed:>7.1f}x {size_bytes:>11,}')
+        caremate.orjson = orjson
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
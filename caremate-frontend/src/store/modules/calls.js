@@ -45,8 +45,8 @@ export default {
       commit('SET_LOADING', true)
       try {
         const response = await api.get('/calls/history')
-        commit('SET_CALL_HISTORY', response.data)
-        return response.data
+        commit('SET_CALL_HISTORY', response.data.calls)
+        return response.data.calls
       } catch (error) {
         commit('SET_ERROR', error.message)
         throw error
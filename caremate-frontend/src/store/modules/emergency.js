@@ -94,8 +94,8 @@ export default {
     async triggerAlert({ commit }) {
       try {
         const response = await api.post('/emergency/alert')
-        commit('ADD_ALERT', response.data)
-        return response.data
+        commit('ADD_ALERT', response.data.alert)
+        return response.data.alert
       } catch (error) {
         commit('SET_ERROR', error.message)
         throw error
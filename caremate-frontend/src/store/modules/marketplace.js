@@ -57,7 +57,7 @@ export default {
       commit('SET_LOADING', true)
       try {
         const response = await api.get('/caregivers/search')
-        commit('SET_CAREGIVERS', response.data)
+        commit('SET_CAREGIVERS', response.data.caregivers)
       } catch (error) {
         commit('SET_ERROR', error.message)
       } finally {
@@ -0,0 +1,142 @@
+"""Check Socket.IO presence and call state against both registry backends.
+
+Runs the in-memory registry and the Redis registry (on fakeredis, so no server
+is needed) through the same scenarios with Flask-SocketIO's test client: users
+with several sockets, call notifications, call cleanup when the last socket
+closes, a refresh racing a disconnect, and sockets left behind by a crashed
+worker expiring.
+
+Usage:
+    pip install fakeredis
+    python check_presence.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Point the app at a scratch database before it is imported
+_db_path = os.path.join(tempfile.mkdtemp(), 'check_presence.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+
+import app as caremate
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+PRESENCE_TTL = 1  # seconds; short so expiry can be observed
+
+
+def registries():
+    """(name, registry factory) for every backend"""
+    backends = [('memory', caremate.MemoryPresenceRegistry)]
+    if fakeredis is not None:
+        backends.append(('redis', lambda: caremate.RedisPresenceRegistry(
+            fakeredis.FakeRedis(), PRESENCE_TTL, caremate.app.config['CALL_STATE_TTL']
+        )))
+    return backends
+
+
+def seed(client):
+    """Register a caller and a callee; returns their tokens"""
+    tokens = []
+    for email, user_type in [('caller@example.com', 'elderly'), ('callee@example.com', 'family')]:
+        response = client.post('/api/auth/register', json={
+            'email': email, 'password': 'password', 'user_type': user_type,
+            'name': email.split('@')[0], 'phone': '1234567890'
+        })
+        tokens.append(response.get_json()['token'])
+    return tokens
+
+
+def connect(client, token):
+    return caremate.socketio.test_client(caremate.app, flask_test_client=client,
+                                         headers={'Authorization': f'Bearer {token}'})
+
+
+def start_call(client, caller, callee_id):
+    response = client.post('/api/calls/start', headers={'Authorization': f'Bearer {caller}'},
+                           json={'callee_id': callee_id})
+    return response.get_json()
+
+
+def check(backend, client, caller, callee, failures):
+    """Run every scenario against the current registry, appending failed expectations"""
+    presence = caremate.presence
+
+    def expect(condition, description):
+        print(f"{'ok' if condition else 'FAIL':5} {backend}: {description}")
+        if not condition:
+            failures.append(f'{backend}: {description}')
+
+    caller_socket = connect(client, caller)
+    callee_phone, callee_laptop = connect(client, callee), connect(client, callee)
+    expect(presence.online([1, 2, 3]) == {1, 2}, 'connected users are online')
+
+    call = start_call(client, caller, 2)
+    expect(call.get('callee_online') is True, 'start_call reports the callee online')
+    received = [[event['name'] for event in socket.get_received()] for socket in (callee_phone, callee_laptop)]
+    expect(received == [['incoming_call'], ['incoming_call']], 'every callee socket gets incoming_call')
+
+    callee_phone.emit('join_call', {'room_id': call['room_id']})
+    expect(presence.get_call(call['room_id']) is not None, 'joining stores the call state')
+    callee_phone.disconnect()
+    expect(presence.is_online(2) and presence.get_call(call['room_id']) is not None,
+           'closing one of two sockets keeps the user online and the call going')
+    callee_laptop.disconnect()
+    expect(not presence.is_online(2), 'closing the last socket takes the user offline')
+    expect(presence.get_call(call['room_id']) is None and presence.calls_for_user(1) == [],
+           'closing the last socket ends the call for both users')
+
+    # A refresh that runs after a disconnect must not bring the socket back
+    callee_socket = connect(client, callee)
+    callee_socket.disconnect()
+    caremate.refresh_local_presence()
+    expect(not presence.is_online(2), 'a refresh after a disconnect keeps the socket offline')
+
+    if backend == 'redis':
+        # A crashed worker's socket lingers until it expires; the call still ends then
+        callee_socket = connect(client, callee)
+        call = start_call(client, caller, 2)
+        callee_socket.emit('join_call', {'room_id': call['room_id']})
+        presence.connect(2, 'socket-of-a-crashed-worker')
+        callee_socket.disconnect()
+        expect(presence.get_call(call['room_id']) is not None,
+               'an unexpired stale socket keeps the user online at first')
+        time.sleep(PRESENCE_TTL + 1.5)
+        expect(not presence.is_online(2), 'the stale socket expires after PRESENCE_TTL')
+        expect(presence.get_call(call['room_id']) is None, 'the call ends once the stale socket expired')
+
+    caller_socket.disconnect()
+    expect(presence.online([1, 2]) == set(), 'everyone is offline at the end')
+
+
+def main():
+    if fakeredis is None:
+        print('fakeredis is not installed (pip install fakeredis); checking the memory backend only')
+    caremate.app.extensions['mail'].suppress = True
+    caremate.celery.conf.CELERY_ALWAYS_EAGER = True
+    caremate.app.config['PRESENCE_TTL'] = PRESENCE_TTL
+    with caremate.app.app_context():
+        caremate.upgrade_database()
+
+    client = caremate.app.test_client()
+    caller, callee = seed(client)
+    failures = []
+    for backend, registry in registries():
+        caremate.presence = registry()
+        check(backend, client, caller, callee, failures)
+
+    if failures:
+        print('\nPresence checks failed:')
+        for failure in failures:
+            print(f'  {failure}')
+        return 1
+    print('\nPresence and call state behave the same on every backend')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Check that every API route's queries are served by an index.
+
+Runs each route against a throwaway SQLite database seeded with sample data,
+captures the statements it sends to the database and inspects their
+EXPLAIN QUERY PLAN output for full table scans.
+
+Usage:
+    python check_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+
+# Point the app at a scratch database before it is imported
+_db_path = os.path.join(tempfile.mkdtemp(), 'query_plans.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+
+import app as caremate
+from sqlalchemy import event
+
+# Full scans that are inherent to the query shape rather than a missing index
+ALLOWED_SCANS = {
+    # Unfiltered marketplace listing and facet counts touch every caregiver/tag
+    ('GET /api/caregivers/search', 'caregiver'),
+    ('GET /api/caregivers/search?sort_by=price', 'caregiver'),
+    ('GET /api/caregivers/specializations', 'specialization'),
+    ('GET /api/caregivers/specializations', 'caregiver_specialization'),
+}
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)\b(?! VIRTUAL TABLE)')
+
+
+def seed(client):
+    """Create users, caregivers and some activity; returns auth headers per role"""
+    def register(email, user_type):
+        response = client.post('/api/auth/register', json={
+            'email': email, 'password': 'password', 'user_type': user_type,
+            'name': email.split('@')[0], 'phone': '1234567890'
+        })
+        return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    elderly = register('elderly@example.com', 'elderly')
+    caregiver = register('caregiver@example.com', 'caregiver')
+    family = register('family@example.com', 'family')
+
+    client.post('/api/caregivers/profile', headers=caregiver, json={
+        'hourly_rate': 25.0, 'experience_years': 5, 'specializations': 'Elder care, Dementia care'
+    })
+    with caremate.app.app_context():
+        caremate.Caregiver.query.update({'verification_status': True})
+        caremate.db.session.commit()
+        caremate.refresh_leaderboard()
+    client.post('/api/caregivers/1/reviews', headers=elderly, json={'rating': 5, 'comment': 'Great'})
+    client.post('/api/tasks', headers=elderly, json={
+        'title': 'Take medicine', 'due_time': '2030-01-01T10:00:00', 'task_type': 'medication'
+    })
+    client.post('/api/tasks', headers=elderly, json={
+        'title': 'Blood pressure pill', 'due_time': '2024-01-01T08:00:00', 'task_type': 'medication',
+        'recurrence': 'FREQ=DAILY;INTERVAL=1'
+    })
+    client.post('/api/health/metrics', headers=elderly, json={
+        'metric_type': 'heart_rate', 'value': 72, 'unit': 'bpm'
+    })
+    client.post('/api/health/metrics', headers=elderly, json={
+        'metric_type': 'blood_pressure', 'systolic': 120, 'diastolic': 80
+    })
+    client.post('/api/care-team', headers=elderly, json={'email': 'caregiver@example.com'})
+    client.post('/api/emergency/contacts', headers=elderly, json={
+        'name': 'Son', 'email': 'family@example.com', 'phone': '1122334455', 'relationship': 'son'
+    })
+    return {'elderly': elderly, 'caregiver': caregiver, 'family': family}
+
+
+def routes():
+    """(role, method, path, json) for every route whose queries should be checked"""
+    return [
+        ('caregiver', 'GET', '/api/caregivers/profile', None),
+        ('elderly', 'GET', '/api/caregivers/search', None),
+        ('elderly', 'GET', '/api/caregivers/search?sort_by=price', None),
+        ('elderly', 'GET', '/api/caregivers/search?specialization=dementia%20care', None),
+        ('elderly', 'GET', '/api/caregivers/search?q=dementia', None),
+        ('elderly', 'GET', '/api/caregivers/specializations', None),
+        ('elderly', 'GET', '/api/caregivers/1/rating', None),
+        ('elderly', 'GET', '/api/caregivers/1/reviews', None),
+        ('elderly', 'GET', '/api/caregivers/1/reviews?per_page=1&cursor=WyIyMDMwLTAxLTAxVDEwOjAwOjAwIiwgMV0=', None),
+        ('elderly', 'GET', '/api/caregivers/top', None),
+        ('elderly', 'GET', '/api/caregivers/top?specialization=dementia%20care', None),
+        ('family', 'POST', '/api/caregivers/1/reviews', {'rating': 4}),
+        ('elderly', 'GET', '/api/tasks', None),
+        ('elderly', 'GET', '/api/tasks?per_page=1&include_total=true', None),
+        ('elderly', 'GET', '/api/tasks?per_page=1&cursor=WyIyMDMwLTAxLTAxVDEwOjAwOjAwIiwgMV0=', None),
+        ('elderly', 'GET', '/api/tasks?start=2030-01-01T00:00:00&end=2030-01-08T00:00:00', None),
+        ('elderly', 'GET', '/api/tasks?start=2030-01-01T00:00:00&per_page=2&cursor=WyIyMDMwLTAxLTAxVDA4OjAwOjAwIiwgMl0=&include_total=true', None),
+        ('elderly', 'GET', '/api/tasks/upcoming', None),
+        ('elderly', 'PUT', '/api/tasks/2/occurrences/2030-01-01T08:00:00', {'is_completed': True}),
+        ('caregiver', 'GET', '/api/tasks', None),
+        ('elderly', 'GET', '/api/care-team', None),
+        ('caregiver', 'GET', '/api/care-team', None),
+        ('family', 'GET', '/api/care-team/tasks', None),
+        ('caregiver', 'GET', '/api/care-team/tasks?start=2029-12-31T00:00:00&status=pending&type=medication&include_total=true', None),
+        ('caregiver', 'GET', '/api/care-team/tasks?start=2029-12-31T00:00:00&patient_id=1&group_by=patient&per_page=1&cursor=WzEsICIyMDMwLTAxLTAxVDA4OjAwOjAwIiwgMl0=', None),
+        ('caregiver', 'GET', '/api/care-team/tasks/upcoming', None),
+        ('family', 'DELETE', '/api/care-team/1', None),
+        ('caregiver', 'POST', '/api/tasks/bulk', [
+            {'title': 'Morning walk', 'due_time': '2030-01-02T09:00:00', 'task_type': 'exercise', 'user_id': 1},
+            {'title': 'Insulin', 'due_time': '2030-01-01T07:00:00', 'task_type': 'medication', 'user_id': 1,
+             'recurrence': 'FREQ=DAILY'}
+        ]),
+        ('caregiver', 'PUT', '/api/tasks/bulk', [{'id': 3, 'title': 'Evening walk'}, {'id': 4, 'task_type': 'insulin'}]),
+        ('caregiver', 'POST', '/api/tasks/bulk/complete', [{'id': 3}, {'id': 4, 'occurrence': '2030-01-02T07:00:00'},
+                                                          {'id': 4, 'occurrence': '2030-01-01T07:00:00', 'is_completed': False}]),
+        ('caregiver', 'POST', '/api/tasks/bulk/delete', [{'id': 3}, {'id': 4}]),
+        ('elderly', 'PUT', '/api/tasks/1', {'is_completed': True}),
+        ('elderly', 'GET', '/api/emergency/contacts', None),
+        ('elderly', 'POST', '/api/emergency/test', None),
+        ('elderly', 'POST', '/api/emergency/alert', {'message': 'Help', 'location': 'Kitchen'}),
+        ('elderly', 'GET', '/api/emergency/alerts', None),
+        ('elderly', 'GET', '/api/emergency/alerts?per_page=1&cursor=WyIyMDMwLTAxLTAxVDEwOjAwOjAwIiwgMV0=', None),
+        ('family', 'GET', '/api/emergency/alerts/received', None),
+        ('family', 'GET', '/api/emergency/alerts/received?per_page=1&cursor=WzFd', None),
+        ('family', 'GET', '/api/emergency/alerts/active', None),
+        ('elderly', 'GET', '/api/emergency/alert/1', None),
+        ('family', 'POST', '/api/emergency/alert/1/acknowledge', None),
+        ('elderly', 'PUT', '/api/emergency/alert/1/resolve', None),
+        ('elderly', 'POST', '/api/health/metrics/batch', [
+            {'metric_type': 'heart_rate', 'value': 75, 'unit': 'bpm', 'idempotency_key': 'reading-1'},
+            {'metric_type': 'blood_pressure', 'systolic': 118, 'diastolic': 76, 'idempotency_key': 'reading-2'}
+        ]),
+        ('elderly', 'GET', '/api/health/metrics', None),
+        ('elderly', 'GET', '/api/health/metrics?type=heart_rate', None),
+        ('elderly', 'GET', '/api/health/metrics?days=30&type=heart_rate', None),
+        ('elderly', 'GET', '/api/health/metrics?days=365', None),
+        ('elderly', 'GET', '/api/health/metrics?per_page=1&cursor=WyIyMDMwLTAxLTAxVDEwOjAwOjAwIiwgMV0=', None),
+        ('elderly', 'GET', '/api/health/metrics?days=365&per_page=1&include_total=true', None),
+        ('elderly', 'GET', '/api/health/metrics/export', None),
+        ('caregiver', 'GET', '/api/health/metrics/export?format=ndjson&user_id=1&type=heart_rate&after=2020-01-01T00:00:00&after_id=1', None),
+        ('elderly', 'GET', '/api/health/summary', None),
+        ('elderly', 'GET', '/api/health/summary?days=365', None),
+        ('elderly', 'GET', '/api/health/trends', None),
+        ('elderly', 'GET', '/api/health/trends?days=365&type=blood_pressure', None),
+        ('elderly', 'GET', '/api/health/alerts', None),
+        ('elderly', 'GET', '/api/health/alert-rules', None),
+        ('elderly', 'PUT', '/api/health/alert-rules', {'rules': {'heart_rate': {'value': {'max': 110}}}}),
+        ('elderly', 'GET', '/api/calls/history', None),
+        ('elderly', 'GET', '/api/calls/history?direction=incoming&status=missed&since=2024-01-01T00:00:00', None),
+        ('elderly', 'GET', '/api/calls/history?counterpart=2', None),
+        ('elderly', 'GET', '/api/calls/stats', None),
+        ('elderly', 'GET', '/api/calls/stats?direction=outgoing', None),
+        ('elderly', 'GET', '/api/calls/history?per_page=1&cursor=WyIyMDMwLTAxLTAxVDEwOjAwOjAwIiwgMV0=', None),
+    ]
+
+
+def main():
+    caremate.app.extensions['mail'].suppress = True
+    caremate.celery.conf.CELERY_ALWAYS_EAGER = True
+    with caremate.app.app_context():
+        caremate.upgrade_database()
+        engine = caremate.db.engine
+
+    client = caremate.app.test_client()
+    headers = seed(client)
+    tables = set(caremate.db.metadata.tables)
+
+    captured = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            captured.append((statement, parameters))
+
+    failures = []
+    for role, method, path, body in routes():
+        captured.clear()
+        response = client.open(path, method=method, headers=headers[role], json=body)
+        # Streamed responses only query the database as the body is read
+        response.get_data()
+        response.close()
+        route = f'{method} {path}'
+        if response.status_code >= 500:
+            failures.append(f'{route}: HTTP {response.status_code}')
+            continue
+
+        statements = list(captured)
+        scans = set()
+        with engine.connect() as connection:
+            raw = connection.connection.driver_connection
+            for statement, parameters in statements:
+                for row in raw.execute(f'EXPLAIN QUERY PLAN {statement}', parameters):
+                    match = SCAN_PATTERN.match(row[3])
+                    # Subqueries show up as SCAN anon_N; only real tables matter
+                    if match and match.group(1) in tables and (route, match.group(1)) not in ALLOWED_SCANS:
+                        scans.add((match.group(1), statement.split()[0]))
+
+        status = 'ok' if not scans else 'FULL SCAN'
+        print(f'{status:9} {route} ({len(statements)} queries)')
+        for table_name, kind in sorted(scans):
+            failures.append(f'{route}: {kind} scans table {table_name}')
+
+    if failures:
+        print('\nQueries without a usable index:')
+        for failure in failures:
+            print(f'  {failure}')
+        return 1
+    print('\nAll route queries use an index')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())